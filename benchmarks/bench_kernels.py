@@ -0,0 +1,89 @@
+"""
+Benchmark of the `"numba"` kernel backend against the `"numpy"` one.
+
+usage: python -m benchmarks.bench_kernels [--repeat 3] [--sizes 10000 50000]
+
+For each population size the kernels of both backends are timed on the same points, at the
+density of 1000 people in the configured box, together with one step of
+`Population.find_interactions` in each mode.  The Numba kernels are compiled before timing.
+Without Numba the loops would run as plain Python, so the benchmark refuses to run.
+"""
+import argparse
+import sys
+import time
+
+import numpy as np
+
+from covid import kernels
+from covid.config import MAX_DIST, SIDE_LEN
+from covid.population import _LOWER, _UPPER
+from covid.simulate import new_population
+
+SIZES = [10000, 50000, 200000]
+
+
+def best_time(fn, repeat=3):
+    """best wall time of `repeat` calls, after one call to warm up"""
+    fn()
+    times = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - t0)
+    return min(times)
+
+
+def cases(n, rng):
+    """name and function to time with each backend, for `n` people"""
+    side = SIDE_LEN * np.sqrt(n / 1000.0)
+    x, y = side * rng.random((2, n)) - side / 2.0
+    qx, qy = x[: n // 100], y[: n // 100]
+    pos, vel = np.column_stack([x, y]), rng.normal(size=(n, 2))
+    moving = rng.random(n) < 0.8
+    pop = new_population(n, rng=rng)
+    pop.infect(np.arange(n // 100))
+    # the same points, spread over a box larger than that of the model to keep the density
+    pop.pos[:] = pos
+
+    def interactions(backend, mode):
+        pop.backend = backend
+        return pop.find_interactions(rng=0, mode=mode)
+
+    return {
+        "move": lambda k: k.move(pos.copy(), vel.copy(), moving, _LOWER, _UPPER, 1.0),
+        "find_pairs": lambda k: k.find_pairs(x, y, MAX_DIST),
+        "find_neighbors": lambda k: k.find_neighbors(x, y, qx, qy, MAX_DIST),
+        "find_interactions[pairs]": lambda k: interactions(k.name, "pairs"),
+        "find_interactions[infectious]": lambda k: interactions(k.name, "infectious"),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--sizes", type=int, nargs="+", default=SIZES)
+    args = parser.parse_args()
+    if not kernels.HAVE_NUMBA:
+        print("numba is not installed")
+        return 1
+
+    print(
+        "{:<30} {:>8} {:>12} {:>12} {:>9}".format(
+            "kernel", "n", "numpy (s)", "numba (s)", "speedup"
+        )
+    )
+    for n in args.sizes:
+        for name, fn in cases(n, np.random.default_rng(0)).items():
+            t_numpy = best_time(lambda: fn(kernels.NUMPY), args.repeat)
+            t_numba = best_time(lambda: fn(kernels.LOOPS), args.repeat)
+            print(
+                "{:<30} {:8d} {:12.4f} {:12.4f} {:8.1f}x".format(
+                    name, n, t_numpy, t_numba, t_numpy / t_numba
+                ),
+                flush=True,
+            )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
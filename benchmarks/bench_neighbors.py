@@ -0,0 +1,54 @@
+"""
+Scaling benchmark for the neighbor search used by `Patient.find_interactions`.
+
+usage: python -m benchmarks.bench_neighbors [--fixed-box] [--repeat 3]
+
+By default the box grows with `n` so that the density (and therefore the number of pairs per
+person) stays at that of 1000 people in the configured box.  With `--fixed-box` all people are
+placed in the configured box, in which case the number of pairs in range itself grows as n^2.
+"""
+import argparse
+import time
+
+import numpy as np
+
+from covid.config import MAX_DIST, SIDE_LEN
+from covid.neighbors import brute_force_pairs, find_pairs
+
+SIZES = [1000, 2000, 5000, 10000, 20000, 50000, 100000]
+MAX_BRUTE_FORCE = 5000
+
+
+def best_time(fn, *args, repeat=3):
+    """best wall time of `repeat` calls"""
+    times = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        result = fn(*args)
+        times.append(time.perf_counter() - t0)
+    return min(times), result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--fixed-box", action="store_true", help="do not scale the box with n")
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    print(
+        "{:>8} {:>10} {:>12} {:>12} {:>12}".format("n", "pairs", "grid (s)", "brute (s)", "speedup")
+    )
+    for n in SIZES:
+        side = SIDE_LEN if args.fixed_box else SIDE_LEN * np.sqrt(n / 1000.0)
+        x, y = side * np.random.random_sample(size=(2, n)) - side / 2.0
+        t_grid, (i, _, _) = best_time(find_pairs, x, y, MAX_DIST, repeat=args.repeat)
+        if n <= MAX_BRUTE_FORCE:
+            t_brute, _ = best_time(brute_force_pairs, x, y, MAX_DIST, repeat=args.repeat)
+            brute, speedup = "{:12.4f}".format(t_brute), "{:12.1f}".format(t_brute / t_grid)
+        else:
+            brute, speedup = "{:>12}".format("-"), "{:>12}".format("-")
+        print("{:8d} {:10d} {:12.4f} {} {}".format(n, i.size, t_grid, brute, speedup))
+
+
+if __name__ == "__main__":
+    main()
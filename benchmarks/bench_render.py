@@ -0,0 +1,101 @@
+"""
+Frames per second of the animation renderer against the number of people.
+
+usage: python -m benchmarks.bench_render [--frames 20]
+
+Compares redrawing everything every frame (the old `plot_points`, which cleared the axes and
+rebuilt the plot and legend), the reused artists of `FrameRenderer` with a full canvas draw, and
+`FrameRenderer` with blitting (only the scatter artists are redrawn onto a cached background).
+
+`create_animation` saves its videos with `Animation.save`, which draws the whole canvas for every
+frame, so the "artists" column is what it achieves.  Blitting only applies to an animation shown
+interactively, hence the "blit (live)" column.
+"""
+import argparse
+import time
+
+import matplotlib
+
+matplotlib.use("Agg")
+
+import matplotlib.pyplot as plt  # noqa: E402  pylint: disable=C0413
+import numpy as np  # noqa: E402  pylint: disable=C0413
+from matplotlib.lines import Line2D  # noqa: E402  pylint: disable=C0413
+
+from covid.config import MAX_X, MAX_Y, MIN_X, MIN_Y  # noqa: E402  pylint: disable=C0413
+from covid.frames import frame_points  # noqa: E402  pylint: disable=C0413
+from covid.visuals import FrameRenderer  # noqa: E402  pylint: disable=C0413
+
+SIZES = [500, 1000, 5000, 10000, 50000]
+
+
+def random_frames(n, n_frames, rng):
+    """frames of random positions and states"""
+    frames = np.empty((n_frames, n, 3), dtype=np.float32)
+    frames[..., :2] = rng.uniform(MIN_X, MAX_X, size=(n_frames, n, 2))
+    frames[..., 2] = rng.integers(4, size=(n_frames, n))
+    return frames
+
+
+def redraw_all(ax, dct):
+    """what every frame used to cost: clear the axes and rebuild the plot and legend"""
+    ax.cla()
+    colors = [
+        ("dead", "black"),
+        ("infected", "red"),
+        ("immune", "green"),
+        ("susceptible", "purple"),
+    ]
+    for k, color in colors:
+        if dct[k].size >= 2:
+            ax.plot(dct[k][0], dct[k][1], marker="o", color=color, linestyle="", alpha=0.7)
+    ax.set_xlim([MIN_X, MAX_X])
+    ax.set_ylim([MIN_Y, MAX_Y])
+    ax.get_xaxis().set_ticks([])
+    ax.get_yaxis().set_ticks([])
+    lines = [
+        Line2D([0], [0], color=c, lw=4, alpha=0.7) for c in ["purple", "red", "green", "black"]
+    ]
+    ax.legend(lines, ["Susceptible", "Infected", "Recovered", "Dead"], loc="upper right")
+
+
+def fps(frames, mode):
+    """frames per second of rendering `frames` in one of the modes"""
+    fig, ax = plt.subplots(1, figsize=(10, 10))
+    renderer = FrameRenderer(ax)
+    fig.canvas.draw()
+    background = fig.canvas.copy_from_bbox(ax.bbox)
+    t0 = time.perf_counter()
+    for frame in frames:
+        dct = frame_points(frame)
+        if mode == "redraw":
+            redraw_all(ax, dct)
+            fig.canvas.draw()
+        elif mode == "artists":
+            renderer.draw(dct)
+            fig.canvas.draw()
+        else:
+            fig.canvas.restore_region(background)
+            for artist in renderer.draw(dct):
+                ax.draw_artist(artist)
+            fig.canvas.blit(ax.bbox)
+    elapsed = time.perf_counter() - t0
+    plt.close(fig)
+    return len(frames) / elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--frames", type=int, default=20)
+    args = parser.parse_args()
+    rng = np.random.default_rng(0)
+
+    modes = {"redraw": "redraw", "artists": "artists (save)", "blit": "blit (live)"}
+    print("{:>8}".format("n") + "".join("{:>20}".format(h + " fps") for h in modes.values()))
+    for n in SIZES:
+        frames = random_frames(n, args.frames, rng)
+        print("{:8d}".format(n) + "".join("{:20.1f}".format(fps(frames, m)) for m in modes))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,273 @@
+"""
+Benchmark suite for the simulation hot paths.
+
+usage: python -m benchmarks.bench_suite [--quick] [--repeat 3] [--only run_sim]
+                                        [--baseline benchmarks/baseline.json] [--save-baseline]
+                                        [--tolerance 0.3]
+
+Every case is run for a sweep of population sizes `n` (and, for full runs, numbers of steps).  For
+each one the best wall time per step of `--repeat` runs, the throughput in agent-steps per second
+and the peak memory traced by `tracemalloc` (in a separate run, so tracing doesn't slow the timed
+ones) are reported and compared with the baseline: cases more than `--tolerance` slower than
+their baseline (and by more than timer noise) are flagged and make the exit status non-zero.
+Cases without a baseline, e.g. the sizes of `--quick`, are reported but never flagged.
+`--save-baseline` stores the results as the new baseline instead.
+
+The committed `baseline.json` was recorded on the development machine, and timings are only
+comparable on the machine that recorded them: regenerate it with `--save-baseline` on the target
+machine before comparing against it.
+"""
+import argparse
+import json
+import os
+import sys
+import time
+import tracemalloc
+
+import matplotlib
+
+matplotlib.use("Agg")
+
+import matplotlib.pyplot as plt  # noqa: E402  pylint: disable=C0413
+import numpy as np  # noqa: E402  pylint: disable=C0413
+
+from covid.model import Patient  # noqa: E402  pylint: disable=C0413
+from covid.simulate import (  # noqa: E402  pylint: disable=C0413
+    add_remove_patients,
+    new_patients,
+    new_population,
+)
+from covid.visuals import FrameRenderer  # noqa: E402  pylint: disable=C0413
+from run_sim import count_cases, get_points, run_sim  # noqa: E402  pylint: disable=C0413
+
+BASELINE = os.path.join(os.path.dirname(__file__), "baseline.json")
+
+SIZES = [1000, 4000, 16000]
+STEPS = [25, 100]
+QUICK_SIZES = [500, 2000]
+QUICK_STEPS = [10]
+# the per-person Python objects of `Patient.find_interactions` are only run for small populations
+MAX_PATIENTS = 4000
+# slowdowns of less than this many seconds per step are timer noise, not regressions
+NOISE_FLOOR = 1e-4
+
+PARAMS = dict(
+    mu_add_at_step=1.0,
+    mu_remove_at_step=1.0,
+    infection_length_mean=15,
+    proactive_isolate_frac=0.2,
+    stop_when_extinct=False,
+)
+
+
+def infected_population(n, rng=0):
+    """a population with 1% of people infected"""
+    pop = new_population(n, rng=rng)
+    pop.infect(np.arange(max(1, n // 100)))
+    return pop
+
+
+def patient_interactions(n, steps):
+    """one step of interactions among `Patient` objects"""
+    patients = new_patients(n, rng=0)
+    for p in patients[: max(1, n // 100)]:
+        p.infection.infect()
+    return lambda: Patient.find_interactions(patients, rng=0)
+
+
+def population_interactions(mode, sort=False):
+    """one step of interactions of a `Population` in the given mode, optionally sorted spatially"""
+
+    def setup(n, steps):
+        pop = infected_population(n)
+        if sort:
+            pop.sort_spatially()
+        return lambda: pop.find_interactions(rng=0, mode=mode)
+
+    return setup
+
+
+def build(fn):
+    """creating `n` people with `fn`"""
+
+    def setup(n, steps):
+        return lambda: fn(n, rng=0)
+
+    return setup
+
+
+def add_remove(n, steps):
+    """adding and removing 1% of people"""
+    pop = infected_population(n)
+    rng = np.random.default_rng(0)
+    return lambda: add_remove_patients(n // 100, n // 100, pop, rng=rng)
+
+
+def counts(n, steps):
+    """counting cases"""
+    pop = infected_population(n)
+    return lambda: count_cases(pop)
+
+
+def points(n, steps):
+    """positions of the people in each category"""
+    pop = infected_population(n)
+    return lambda: get_points(pop)
+
+
+def full_run(n, steps):
+    """a whole `run_sim`, with 1% of people infected at first"""
+    return lambda: run_sim(n=n, steps=steps, initially_infected=max(1, n // 100), rng=0, **PARAMS)
+
+
+def render(n, steps):
+    """drawing one animation frame"""
+    pop = infected_population(n)
+    fig, ax = plt.subplots(1, figsize=(10, 10))
+    renderer = FrameRenderer(ax)
+    fig.canvas.draw()
+
+    def draw():
+        renderer.draw(get_points(pop))
+        fig.canvas.draw()
+
+    return draw
+
+
+# name: (setup(n, steps) returning the function to time, whether one call runs `steps` steps)
+CASES = {
+    "Patient.find_interactions": (patient_interactions, False),
+    "find_interactions[pairs]": (population_interactions("pairs"), False),
+    "find_interactions[infectious]": (population_interactions("infectious"), False),
+    "find_interactions[sorted]": (population_interactions("infectious", sort=True), False),
+    "new_patients": (build(new_patients), False),
+    "new_population": (build(new_population), False),
+    "add_remove_patients": (add_remove, False),
+    "count_cases": (counts, False),
+    "get_points": (points, False),
+    "run_sim": (full_run, True),
+    "render": (render, False),
+}
+
+
+def measure(setup, n, steps, repeat):
+    """best wall time and peak traced memory of a case"""
+    times = []
+    for _ in range(repeat):
+        fn = setup(n, steps)
+        t0 = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - t0)
+    fn = setup(n, steps)
+    tracemalloc.start()
+    fn()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    plt.close("all")
+    return min(times), peak
+
+
+def run_cases(names, sizes, step_sweep, repeat):
+    """
+    run the benchmarks
+
+    Returns
+    -------
+    List[dict]
+    """
+    results = []
+    for name in names:
+        setup, multi_step = CASES[name]
+        for n in sizes:
+            if name == "Patient.find_interactions" and n > MAX_PATIENTS:
+                continue
+            for steps in step_sweep if multi_step else [1]:
+                elapsed, peak = measure(setup, n, steps, repeat)
+                per_step = elapsed / steps
+                results.append(
+                    {
+                        "case": name,
+                        "n": n,
+                        "steps": steps,
+                        "time per step": per_step,
+                        "agent-steps/s": n / per_step,
+                        "peak MB": peak / 2.0 ** 20,
+                    }
+                )
+                print(format_row(results[-1]), flush=True)
+    return results
+
+
+def format_row(row, baseline=None):
+    """a line of the report, with the time relative to the baseline if there is one"""
+    line = "{:<30} {:>7d} {:>6d} {:>14.6f} {:>14.3g} {:>9.1f}".format(
+        row["case"],
+        row["n"],
+        row["steps"],
+        row["time per step"],
+        row["agent-steps/s"],
+        row["peak MB"],
+    )
+    if baseline:
+        ratio = row["time per step"] / baseline["time per step"]
+        line += " {:>8.2f}x".format(ratio)
+    return line
+
+
+def compare(results, baseline, tolerance):
+    """
+    print each result against its baseline
+
+    Returns
+    -------
+    List[dict]
+        the results that are more than `tolerance` slower than their baseline
+    """
+    index = {(b["case"], b["n"], b["steps"]): b for b in baseline}
+    print()
+    print(
+        "{:<30} {:>7} {:>6} {:>14} {:>14} {:>9} {:>9}".format(
+            "case", "n", "steps", "s/step", "agent-steps/s", "peak MB", "vs base"
+        )
+    )
+    regressions = []
+    for row in results:
+        base = index.get((row["case"], row["n"], row["steps"]))
+        line = format_row(row, base)
+        slower = row["time per step"] - base["time per step"] if base else 0.0
+        if base and slower > max(tolerance * base["time per step"], NOISE_FLOOR):
+            regressions.append(row)
+            line += "  REGRESSION"
+        print(line)
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--quick", action="store_true", help="small sizes, for a smoke test")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--only", nargs="+", choices=list(CASES), default=list(CASES))
+    parser.add_argument("--baseline", default=BASELINE)
+    parser.add_argument("--save-baseline", action="store_true")
+    parser.add_argument("--tolerance", type=float, default=0.3)
+    args = parser.parse_args()
+
+    sizes, step_sweep = (QUICK_SIZES, QUICK_STEPS) if args.quick else (SIZES, STEPS)
+    results = run_cases(args.only, sizes, step_sweep, args.repeat)
+    if args.save_baseline:
+        with open(args.baseline, "w") as f:
+            json.dump(results, f, indent=1)
+        print(f"saved baseline to {args.baseline}")
+        return 0
+    if not os.path.exists(args.baseline):
+        print(f"no baseline at {args.baseline}; run with --save-baseline to create one")
+        return 0
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    regressions = compare(results, baseline, args.tolerance)
+    print(f"\n{len(regressions)} regression(s) beyond {args.tolerance:.0%}")
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,138 @@
+"""Streaming, constant-memory aggregation of realizations"""
+# pylint: disable=C0103
+import numpy as np
+import pandas as pd
+
+
+class StreamingAggregator:
+    """
+    Running statistics of the counts of each compartment at each step over realizations that
+    arrive one at a time.  Nothing is kept per realization, so memory is
+    O(steps x compartments x n_bins) however many realizations are merged.
+
+    Mean and variance are updated with Welford's algorithm.  Median and other quantiles are read
+    from a histogram with `n_bins` fixed-width bins per step and compartment.  The bins start at
+    `bin_width` wide and whenever a value falls beyond the last bin, neighbouring bins are merged
+    pairwise, doubling the width.  Counts are non-negative integers, so quantiles are exact as long
+    as the bins stay one wide (e.g. up to 1024 people with the defaults), and otherwise within half
+    a bin of the exact value.
+
+    Parameters
+    ----------
+    n_bins : int
+        number of bins of the histograms, even
+    bin_width : int
+        initial width of the bins
+    """
+
+    def __init__(self, n_bins=1024, bin_width=1):
+        if n_bins % 2:
+            raise ValueError("n_bins must be even")
+        self.n_bins = n_bins
+        self.bin_width = bin_width
+        self.count = 0
+        self.cols, self.steps = None, None
+        self.mean, self.m2, self.hist = None, None, None
+
+    def _start(self, result):
+        self.cols = [col for col in result.columns if col != "step"]
+        self.steps = result["step"].to_numpy()
+        shape = (len(result), len(self.cols))
+        self.mean = np.zeros(shape)
+        self.m2 = np.zeros(shape)
+        self.hist = np.zeros(shape + (self.n_bins,), dtype=np.int64)
+
+    def _widen(self, top):
+        """double the width of the bins until `top` falls in the last one"""
+        while top >= self.n_bins * self.bin_width:
+            half = self.hist.reshape(self.hist.shape[:-1] + (-1, 2)).sum(axis=-1)
+            self.hist = np.zeros_like(self.hist)
+            self.hist[..., : self.n_bins // 2] = half
+            self.bin_width *= 2
+
+    def update(self, result):
+        """
+        merge one realization
+
+        Parameters
+        ----------
+        result : pd.DataFrame
+            output of `run_sim`
+        """
+        if self.cols is None:
+            self._start(result)
+        x = result[self.cols].to_numpy(dtype=float)
+        if x.shape != self.mean.shape:
+            raise ValueError(f"expected {self.mean.shape[0]} steps, got {x.shape[0]}")
+
+        self.count += 1
+        delta = x - self.mean
+        self.mean += delta / self.count
+        self.m2 += delta * (x - self.mean)
+
+        self._widen(x.max())
+        b = (x // self.bin_width).astype(np.int64)
+        flat = np.arange(b.size).reshape(b.shape) * self.n_bins + b
+        self.hist.reshape(-1)[flat] += 1
+
+    def _order_statistic(self, k):
+        """approximate `k`th smallest value (0-based) at each step and compartment"""
+        cum = self.hist.cumsum(axis=-1)
+        b = (cum <= k).sum(axis=-1)
+        # the middle of the integers in the bin
+        return b * self.bin_width + (self.bin_width - 1) / 2.0
+
+    def quantile(self, q):
+        """
+        quantile of each compartment at each step, interpolated linearly between order statistics
+        as `np.quantile` does
+
+        Parameters
+        ----------
+        q : float
+            between 0 and 1
+
+        Returns
+        -------
+        np.ndarray, shape (steps, compartments)
+        """
+        pos = q * (self.count - 1)
+        lo, hi = int(np.floor(pos)), int(np.ceil(pos))
+        a, b = self._order_statistic(lo), self._order_statistic(hi)
+        return a + (b - a) * (pos - lo)
+
+    @property
+    def std(self):
+        """sample standard deviation (`ddof=1`), NaN for fewer than two realizations"""
+        if self.count < 2:
+            return np.full(self.mean.shape, np.nan)
+        return np.sqrt(self.m2 / (self.count - 1))
+
+    def result(self, percentiles=()):
+        """
+        statistics of the realizations merged so far
+
+        Parameters
+        ----------
+        percentiles : Iterable[float]
+            percentiles to add as `"{col} p{percentile}"` columns
+
+        Returns
+        -------
+        pd.DataFrame
+            mean, median, std and count of each compartment at each step
+        """
+        if self.count == 0:
+            raise ValueError("no realizations to aggregate")
+        stats = {
+            "mean": self.mean,
+            "median": self.quantile(0.5),
+            "std": self.std,
+            "count": np.full(self.mean.shape, self.count),
+        }
+        for p in percentiles:
+            stats[f"p{p:g}"] = self.quantile(p / 100.0)
+        return pd.DataFrame(
+            {f"{col} {agg}": stats[agg][:, j] for j, col in enumerate(self.cols) for agg in stats},
+            index=pd.Index(self.steps, name="step"),
+        )
@@ -0,0 +1,70 @@
+"""Checkpoints of a running simulation, to resume it after an interruption"""
+# pylint: disable=C0103
+import json
+import os
+
+import numpy as np
+
+from covid.population import CaseHistory, Population
+
+
+def save_checkpoint(path, population, history, rng, step, **arrays):
+    """
+    save the full state of a simulation after `step` steps to an `.npz` file.  The file is written
+    to a temporary name and then moved into place, so an interruption never leaves a half-written
+    checkpoint behind.
+
+    Parameters
+    ----------
+    path : str
+        `.npz` file
+    population : Population
+    history : CaseHistory
+    rng : np.random.Generator
+    step : int
+        number of steps done
+    arrays :
+        any other arrays to save, e.g. precomputed schedules
+    """
+    state = {f"population/{k}": v for k, v in population.to_arrays().items()}
+    state.update(
+        history=history.data,
+        history_size=np.array(history.size),
+        step=np.array(step),
+        rng=np.array(json.dumps(rng.bit_generator.state)),
+    )
+    state.update(arrays)
+    tmp = path + ".tmp.npz"
+    np.savez(tmp, **state)
+    os.replace(tmp, path)
+
+
+def load_checkpoint(path):
+    """
+    load a checkpoint written by `save_checkpoint`
+
+    Parameters
+    ----------
+    path : str
+
+    Returns
+    -------
+    dict
+        the `population`, `history`, `rng` and `step`, and any other arrays that were saved
+    """
+    with np.load(path) as npz:
+        arrays = {k: npz[k] for k in npz.files}
+    population = Population.from_arrays(
+        {k.split("/", 1)[1]: arrays.pop(k) for k in list(arrays) if k.startswith("population/")}
+    )
+    history = CaseHistory(len(arrays["history"]) - 1)
+    history.data[...] = arrays.pop("history")
+    history.size = int(arrays.pop("history_size"))
+
+    rng_state = json.loads(str(arrays.pop("rng")))
+    bit_generator = getattr(np.random, rng_state["bit_generator"])()
+    bit_generator.state = rng_state
+    arrays["step"] = int(arrays["step"])
+    return dict(
+        arrays, population=population, history=history, rng=np.random.Generator(bit_generator)
+    )
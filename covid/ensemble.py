@@ -0,0 +1,152 @@
+"""Many independent realizations simulated together as one population"""
+# pylint: disable=C0103
+import numpy as np
+
+from covid.config import SIDE_LEN
+from covid.population import CASE_DTYPE, DEAD, IMMUNE, INFECTED, SUSCEPTIBLE, Population
+
+
+def block_heads(sizes, k):
+    """
+    indices of the first `k[r]` people of each of the consecutive blocks of `sizes[r]` people
+
+    Parameters
+    ----------
+    sizes : np.ndarray
+    k : np.ndarray
+
+    Returns
+    -------
+    np.ndarray
+    """
+    sizes = np.asarray(sizes, dtype=np.int64)
+    k = np.minimum(np.broadcast_to(np.asarray(k, dtype=np.int64), sizes.shape), sizes)
+    starts = np.cumsum(sizes) - sizes
+    return np.repeat(starts, k) + np.arange(k.sum()) - np.repeat(np.cumsum(k) - k, k)
+
+
+class Ensemble(Population):
+    """
+    `n_real` independent realizations stacked into one flat `Population`, each person labelled
+    with the `realization` they belong to.  Everything that is done person by person (movement,
+    infections, scheduled events, transmission) then advances every realization at once.
+
+    For the neighbor search the realizations are laid side by side, `STRIDE` apart along x, so
+    the cell list never puts people of different realizations in the same or adjacent cells and
+    nobody meets anyone from another realization.
+
+    Parameters
+    ----------
+    realization : array-like
+        realization of each person
+    n_real : int
+        number of realizations
+    kwargs :
+        see `Population`
+    """
+
+    _FIELDS = Population._FIELDS + ("realization",)
+    STRIDE = 4 * SIDE_LEN
+
+    def __init__(self, realization, n_real, **kwargs):
+        self.realization = np.array(realization, dtype=np.int64)
+        self.n_real = n_real
+        super().__init__(**kwargs)
+
+    def _coords(self, ind):
+        x, y = super()._coords(ind)
+        return x + self.STRIDE * self.realization[ind], y
+
+    def _hermits(self, isolate, frac, rng):
+        """as in `Population`, separately in each realization"""
+        hermits = np.flatnonzero(isolate)
+        hermits = hermits[np.argsort(self.realization[hermits], kind="stable")]
+        h = np.bincount(self.realization[hermits], minlength=self.n_real)
+        k = (frac * h).astype(np.int64)
+        first = np.cumsum(h) - h
+        return hermits[np.repeat(first, k) + rng.integers(np.repeat(h, k))]
+
+    def realization_counts(self):
+        """
+        number of people in each state in each realization
+
+        Returns
+        -------
+        np.ndarray, shape (n_real, 4)
+        """
+        key = self.realization * 4 + self.state
+        return np.bincount(key, minlength=4 * self.n_real).reshape(self.n_real, 4)
+
+    def sample_alive_each(self, k, rng=None):
+        """
+        pick up to `k[r]` distinct people at random among those who are not dead in each
+        realization `r`
+
+        Parameters
+        ----------
+        k : np.ndarray, shape (n_real,)
+        rng : np.random.Generator or int (optional)
+            random number generator or seed
+
+        Returns
+        -------
+        np.ndarray
+            indices of the chosen people
+        """
+        rng = np.random.default_rng(rng)
+        alive = np.flatnonzero(self.state != DEAD)
+        # shuffle the living of each realization and take the first k[r]
+        alive = alive[np.lexsort((rng.random(alive.size), self.realization[alive]))]
+        real = self.realization[alive]
+        first = np.searchsorted(real, np.arange(self.n_real))
+        rank = np.arange(alive.size) - first[real]
+        return alive[rank < np.asarray(k)[real]]
+
+
+class EnsembleHistory:
+    """
+    `CaseHistory` of every realization of an `Ensemble`
+
+    Parameters
+    ----------
+    n_real : int
+        number of realizations
+    steps : int
+        number of steps after the initial state
+    """
+
+    def __init__(self, n_real, steps):
+        self.data = np.zeros((n_real, steps + 1), dtype=CASE_DTYPE)
+        self.size = 0
+
+    def append(self, ensemble, step):
+        """
+        record the current counts of every realization
+
+        Parameters
+        ----------
+        ensemble : Ensemble
+        step : int
+        """
+        c = ensemble.realization_counts()
+        row = self.data[:, self.size]
+        row["infected"] = c[:, INFECTED]
+        row["dead"] = c[:, DEAD]
+        row["immune"] = c[:, IMMUNE]
+        row["total"] = c.sum(axis=1) - c[:, DEAD]
+        row["susceptible"] = c[:, SUSCEPTIBLE]
+        row["step"] = step
+        self.size += 1
+
+    def fill(self):
+        """repeat the last row until the end of the run, with consecutive steps"""
+        size = self.size
+        last = self.data[:, size - 1]
+        rest = self.data[:, size:]
+        rest[...] = last[:, None]
+        rest["step"] = last["step"][:, None] + np.arange(1, rest.shape[1] + 1)
+        self.size = self.data.shape[1]
+
+    def records(self, r):
+        """the rows recorded so far of realization `r`"""
+        return self.data[r, : self.size]
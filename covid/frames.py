@@ -0,0 +1,86 @@
+"""Compact storage of animation frames"""
+# pylint: disable=C0103
+import numpy as np
+
+from covid.population import DEAD, IMMUNE, INFECTED, SUSCEPTIBLE
+
+# category of each state code, as used by `get_points`
+CATEGORIES = {"dead": DEAD, "infected": INFECTED, "immune": IMMUNE, "susceptible": SUSCEPTIBLE}
+
+
+class FrameRecorder:
+    """
+    Records the position and state code of everyone at every step into a preallocated
+    `(steps + 1, n, 3)` float32 array of `(x, y, state)`, either in memory or, when `path` is
+    given, in a memory-mapped `.npy` file.  Each person is stored in the column given by their id,
+    so columns of people who are not (or no longer) present are NaN.
+
+    Parameters
+    ----------
+    steps : int
+        number of steps after the initial frame
+    n : int
+        number of people, i.e. the number of ids issued over the run
+    path : str (optional)
+        `.npy` file to write the frames to
+    """
+
+    def __init__(self, steps, n, path=None):
+        shape = (steps + 1, n, 3)
+        if path:
+            self.frames = np.lib.format.open_memmap(path, mode="w+", dtype=np.float32, shape=shape)
+        else:
+            self.frames = np.empty(shape, dtype=np.float32)
+        self.frames[...] = np.nan
+        self.size = 0
+
+    def record(self, population):
+        """
+        record the current frame
+
+        Parameters
+        ----------
+        population : Population
+        """
+        frame = self.frames[self.size]
+        ids = population.ids
+        keep = ids < frame.shape[0]
+        frame[ids[keep], :2] = population.pos[keep]
+        frame[ids[keep], 2] = population.state[keep]
+        self.size += 1
+
+    def close(self):
+        """flush the frames to disk, if memory-mapped"""
+        if isinstance(self.frames, np.memmap):
+            self.frames.flush()
+
+
+def load_frames(path):
+    """
+    open frames written by `FrameRecorder` without reading them into memory
+
+    Parameters
+    ----------
+    path : str
+
+    Returns
+    -------
+    np.memmap
+    """
+    return np.load(path, mmap_mode="r")
+
+
+def frame_points(frame):
+    """
+    positions of the people in each category in one frame
+
+    Parameters
+    ----------
+    frame : np.ndarray, shape (n, 3)
+
+    Returns
+    -------
+    dict
+        the same layout as `get_points`
+    """
+    return {k: frame[frame[:, 2] == code, :2].T for k, code in CATEGORIES.items()}
@@ -0,0 +1,231 @@
+"""
+Backends of the numeric kernels of a `Population`: movement and the neighbor searches behind
+`Population.find_interactions`.
+
+The `"numpy"` backend is the vectorized reference implementation.  The `"numba"` backend runs the
+same cell-list algorithms as explicit loops compiled with Numba, which fill their output in one
+pass instead of building the large temporary arrays of candidate pairs of the vectorized cell list
+(see `benchmarks/bench_kernels.py`).  Both use the k-d tree of `neighbors.has_neighbor`, which is
+faster than a cell list for that query.  Numba is optional: without it `get_backend("numba")` warns
+and falls back to NumPy, and the loops below stay plain (slow) Python functions.
+"""
+# pylint: disable=C0103
+import math
+import types
+import warnings
+
+import numpy as np
+
+from covid import neighbors
+
+try:
+    import numba
+except ImportError:  # pragma: no cover - depends on the environment
+    numba = None
+
+HAVE_NUMBA = numba is not None
+
+# half of the 3x3 block of neighboring cells, see `neighbors.find_pairs`
+_HALF = np.array(neighbors._HALF_OFFSETS, dtype=np.int64)
+
+
+def _jit(fn):
+    if HAVE_NUMBA:
+        return numba.njit(cache=True, nogil=True)(fn)
+    return fn
+
+
+def move(pos, vel, moving, lower, upper, dt):
+    """
+    move everyone who is `moving`, reflecting the velocity of those at a wall, in place
+
+    Parameters
+    ----------
+    pos : np.ndarray, shape (n, 2)
+    vel : np.ndarray, shape (n, 2)
+    moving : np.ndarray
+        boolean mask
+    lower : np.ndarray, shape (2,)
+    upper : np.ndarray, shape (2,)
+    dt : float
+    """
+    p, v = pos[moving], vel[moving]
+    outside = (p <= lower) | (p >= upper)
+    v[outside] = -v[outside]
+    vel[moving] = v
+    pos[moving] = p + v * dt
+
+
+@_jit
+def _move_loop(pos, vel, moving, lower, upper, dt):
+    for a in range(pos.shape[0]):
+        if not moving[a]:
+            continue
+        for k in range(2):
+            if pos[a, k] <= lower[k] or pos[a, k] >= upper[k]:
+                vel[a, k] = -vel[a, k]
+            pos[a, k] += vel[a, k] * dt
+
+
+def _grid(x, y, x0, y0, max_dist):
+    """cells of side `max_dist` from `(x0, y0)`, and the points sorted by cell"""
+    cx = np.floor((x - x0) / max_dist).astype(np.int64)
+    cy = np.floor((y - y0) / max_dist).astype(np.int64)
+    nx, ny = cx.max() + 1, cy.max() + 1
+    key = cx * ny + cy
+    order = np.argsort(key, kind="stable")
+    counts = np.bincount(key, minlength=nx * ny)
+    starts = np.cumsum(counts) - counts
+    return cx, cy, nx, ny, order, starts, counts
+
+
+@_jit
+def _grow(out_i, out_j, out_d, need):
+    """make room for at least `need` more pairs, at least doubling the outputs"""
+    extra = max(out_i.size, need)
+    return (
+        np.concatenate((out_i, np.empty(extra, out_i.dtype))),
+        np.concatenate((out_j, np.empty(extra, out_j.dtype))),
+        np.concatenate((out_d, np.empty(extra, out_d.dtype))),
+    )
+
+
+@_jit
+def _half_range(a, h, scx, scy, nx, ny, starts, counts):
+    """
+    range of sorted points to compare the sorted point `a` with: for `h == 0` those after it in its
+    own cell, otherwise those in the `h`-th cell of `_HALF` next to it
+    """
+    if h == 0:
+        key = scx[a] * ny + scy[a]
+        return a + 1, starts[key] + counts[key]
+    ncx, ncy = scx[a] + _HALF[h - 1, 0], scy[a] + _HALF[h - 1, 1]
+    if ncx >= nx or ncy < 0 or ncy >= ny:
+        return 0, 0
+    key = ncx * ny + ncy
+    return starts[key], starts[key] + counts[key]
+
+
+@_jit
+def _self_pairs(sx, sy, scx, scy, nx, ny, starts, counts, max_dist):
+    """
+    every unordered pair closer than `max_dist` among points sorted by cell, as positions in the
+    sorted order: each point is compared with the points after it in its own cell and with those in
+    half of the adjacent cells, as in `neighbors.find_pairs`
+    """
+    out_i = np.empty(max(16, 4 * sx.size), np.int64)
+    out_j, out_d = np.empty_like(out_i), np.empty(out_i.size, np.float64)
+    # cheap test on the squared distance first; the exact one decides the points near the edge
+    max_d2 = max_dist * max_dist * (1 + 1e-9)
+    k = 0
+    for a in range(sx.size):
+        for h in range(_HALF.shape[0] + 1):
+            lo, hi = _half_range(a, h, scx, scy, nx, ny, starts, counts)
+            # making room once per range rather than per pair keeps the inner loop tight
+            if k + hi - lo > out_i.size:
+                out_i, out_j, out_d = _grow(out_i, out_j, out_d, hi - lo)
+            for b in range(lo, hi):
+                dx, dy = sx[a] - sx[b], sy[a] - sy[b]
+                if dx * dx + dy * dy < max_d2:
+                    d = math.hypot(dx, dy)
+                    if d < max_dist:
+                        out_i[k], out_j[k], out_d[k] = a, b, d
+                        k += 1
+    return out_i[:k], out_j[:k], out_d[:k]
+
+
+@_jit
+def _query_pairs(qx, qy, qcx, qcy, sx, sy, nx, ny, starts, counts, max_dist):
+    """
+    every point, as a position among the points sorted by cell, closer than `max_dist` to each
+    query point, from the 3x3 block of cells around it
+    """
+    out_i = np.empty(max(16, 4 * qx.size), np.int64)
+    out_j, out_d = np.empty_like(out_i), np.empty(out_i.size, np.float64)
+    max_d2 = max_dist * max_dist * (1 + 1e-9)
+    k = 0
+    for q in range(qx.size):
+        for ncx in range(max(qcx[q] - 1, 0), min(qcx[q] + 2, nx)):
+            for ncy in range(max(qcy[q] - 1, 0), min(qcy[q] + 2, ny)):
+                key = ncx * ny + ncy
+                if k + counts[key] > out_i.size:
+                    out_i, out_j, out_d = _grow(out_i, out_j, out_d, counts[key])
+                for b in range(starts[key], starts[key] + counts[key]):
+                    dx, dy = qx[q] - sx[b], qy[q] - sy[b]
+                    if dx * dx + dy * dy < max_d2:
+                        d = math.hypot(dx, dy)
+                        if d < max_dist:
+                            out_i[k], out_j[k], out_d[k] = q, b, d
+                            k += 1
+    return out_i[:k], out_j[:k], out_d[:k]
+
+
+def loop_find_pairs(x, y, max_dist):
+    """`neighbors.find_pairs` as loops"""
+    x, y = np.asarray(x, dtype=float), np.asarray(y, dtype=float)
+    if x.size < 2:
+        return neighbors.find_pairs(x, y, max_dist)
+    cx, cy, nx, ny, order, starts, counts = _grid(x, y, x.min(), y.min(), max_dist)
+    args = x[order], y[order], cx[order], cy[order], nx, ny, starts, counts, max_dist
+    a, b, dist = _self_pairs(*args)
+    a, b = order[a], order[b]
+    i, j = np.minimum(a, b), np.maximum(a, b)
+    # every pair is listed once, so sorting by one key orders them as `np.lexsort((j, i))` does
+    srt = np.argsort(i * x.size + j)
+    return i[srt], j[srt], dist[srt]
+
+
+def loop_find_neighbors(x, y, qx, qy, max_dist):
+    """`neighbors.find_neighbors` as loops"""
+    x, y = np.asarray(x, dtype=float), np.asarray(y, dtype=float)
+    qx, qy = np.asarray(qx, dtype=float), np.asarray(qy, dtype=float)
+    if x.size == 0 or qx.size == 0:
+        return neighbors.find_neighbors(x, y, qx, qy, max_dist)
+    x0, y0 = x.min(), y.min()
+    _, _, nx, ny, order, starts, counts = _grid(x, y, x0, y0, max_dist)
+    qcx = np.floor((qx - x0) / max_dist).astype(np.int64)
+    qcy = np.floor((qy - y0) / max_dist).astype(np.int64)
+    args = qx, qy, qcx, qcy, x[order], y[order], nx, ny, starts, counts, max_dist
+    q, b, dist = _query_pairs(*args)
+    return q, order[b], dist
+
+
+NUMPY = types.SimpleNamespace(
+    name="numpy",
+    move=move,
+    find_pairs=neighbors.find_pairs,
+    find_neighbors=neighbors.find_neighbors,
+    has_neighbor=neighbors.has_neighbor,
+)
+
+LOOPS = types.SimpleNamespace(
+    name="numba",
+    move=_move_loop,
+    find_pairs=loop_find_pairs,
+    find_neighbors=loop_find_neighbors,
+    has_neighbor=neighbors.has_neighbor,
+)
+
+
+def get_backend(name="numpy"):
+    """
+    kernels of a backend
+
+    Parameters
+    ----------
+    name : str
+        `"numpy"` or `"numba"`
+
+    Returns
+    -------
+    types.SimpleNamespace
+        `move`, `find_pairs`, `find_neighbors` and `has_neighbor`
+    """
+    if name == "numpy":
+        return NUMPY
+    if name == "numba":
+        if HAVE_NUMBA:
+            return LOOPS
+        warnings.warn("numba is not installed; falling back to the numpy backend", RuntimeWarning)
+        return NUMPY
+    raise ValueError(f"unknown backend {name!r}")
@@ -1,10 +1,12 @@
 """The core model of a patient and virus"""
 # pylint: disable=C0103
 from dataclasses import dataclass
+from math import ceil
 
 import numpy as np
 
 from covid.config import MAX_DIST, MAX_X, MAX_Y, MIN_X, MIN_Y
+from covid.neighbors import find_pairs
 
 
 @dataclass
@@ -17,14 +19,27 @@ class Virus:
 
     def __post_init__(self):
         self.t = int(self.infection_length)
-        self.curve = self.infection_severity * Virus.get_severity_curve(self.infection_length)
+        self._curve = None
         if self.active:
             self.infect()
 
+    @property
+    def curve(self):
+        """severity curve, scaled by `infection_severity`"""
+        if self._curve is None:
+            return self.infection_severity * severity_curve(self.infection_length)
+        return self._curve
+
+    @curve.setter
+    def curve(self, value):
+        self._curve = value
+
     @property
     def severity(self):
-        ind = self.curve.size - int(self.t) - 1
-        return self.curve[ind]
+        if self._curve is None:
+            curve = severity_curve(self.infection_length)
+            return self.infection_severity * curve[curve.size - int(self.t) - 1]
+        return self._curve[self._curve.size - int(self.t) - 1]
 
     def recover(self):
         """patient recovers and gains immunity"""
@@ -79,6 +94,55 @@ class Virus:
         return curve / curve.max()
 
 
+# normalized severity curves shared by every infection, see `severity_table`
+_SEVERITY_TABLE = np.zeros((1, 1))
+
+
+def severity_table(max_len):
+    """
+    shared table of normalized severity curves, one row per integer curve length.
+
+    `Virus.get_severity_curve(t)` only depends on `ceil(t)`, so row `k` holds the curve for any
+    infection length in `(k - 1, k]`, zero padded to the width of the table.  The table is built
+    once and grown (at least doubling) when a longer curve is requested.
+
+    Parameters
+    ----------
+    max_len : int
+        longest curve length needed
+
+    Returns
+    -------
+    np.ndarray
+        read-only table with at least `max_len + 1` rows and columns
+    """
+    global _SEVERITY_TABLE  # pylint: disable=W0603
+    if _SEVERITY_TABLE.shape[0] <= max_len:
+        size = max(max_len, 2 * (_SEVERITY_TABLE.shape[0] - 1), 64)
+        table = np.zeros((size + 1, size + 1))
+        for k in range(1, size + 1):
+            table[k, : k + 1] = Virus.get_severity_curve(k)
+        table.setflags(write=False)
+        _SEVERITY_TABLE = table
+    return _SEVERITY_TABLE
+
+
+def severity_curve(infection_length):
+    """
+    normalized severity curve for an infection length, as a read-only view of the shared table
+
+    Parameters
+    ----------
+    infection_length : float
+
+    Returns
+    -------
+    np.ndarray
+    """
+    k = int(ceil(infection_length))
+    return severity_table(k)[k, : k + 1]
+
+
 @dataclass
 class Patient:
     x: float
@@ -166,13 +230,19 @@ class Patient:
         self.x += self.vx * dt
         self.y += self.vy * dt
 
-    def change_direction(self):
+    def change_direction(self, rng=None):
         """
         Randomly change direction on interaction
+
+        Parameters
+        ----------
+        rng : np.random.Generator or int (optional)
+            random number generator or seed
         """
+        rng = np.random.default_rng(rng)
         # change direction
-        self.vx = np.random.normal(loc=0.0, scale=3.0)
-        self.vy = np.random.normal(loc=0.0, scale=3.0)
+        self.vx = rng.normal(loc=0.0, scale=3.0)
+        self.vy = rng.normal(loc=0.0, scale=3.0)
 
     def __str__(self):
         return "pos=({:0.2f}, {:0.2f}), vel=({:0.2f}, {:0.2f})".format(
@@ -208,7 +278,7 @@ class Patient:
         """
         return all([not self.is_dead, not self.infection.immune, not self.infection.active])
 
-    def interact(self, other, max_dist=MAX_DIST, dist=None):
+    def interact(self, other, max_dist=MAX_DIST, dist=None, rng=None):
         """
         Interact two people.  If one is
 
@@ -220,13 +290,15 @@ class Patient:
             max distance for interaction to be possible
         dist : float (optional)
             separation
+        rng : np.random.Generator or int (optional)
+            random number generator or seed
 
         Returns
         -------
         None
         """
-
-        self.change_direction()
+        rng = np.random.default_rng(rng)
+        self.change_direction(rng)
 
         if not self.susceptible:
             return
@@ -238,11 +310,11 @@ class Patient:
         if other.infection.active and dist < max_dist:
             val = other.infection.infection_prob / (dist ** 2.0)
             val = min([1.0, val])
-            if np.random.choice([True, False], p=[val, 1.0 - val]):
+            if rng.choice([True, False], p=[val, 1.0 - val]):
                 self.infection.infect()
 
     @staticmethod
-    def find_interactions(patients, partial_isolate=True, frac=0.4):
+    def find_interactions(patients, partial_isolate=True, frac=0.4, rng=None):
         """
         iterate through patents to interact
 
@@ -254,24 +326,25 @@ class Patient:
             if true, include some fraction of the hermits at random in each step
         frac : float < 1
             fraction of hermits who still have to interact anyway this round
+        rng : np.random.Generator or int (optional)
+            random number generator or seed
 
         Returns
         -------
         None
         """
+        rng = np.random.default_rng(rng)
         ind_lst = [
             i for i in range(len(patients)) if not patients[i].is_dead and not patients[i].isolate
         ]
         if partial_isolate:
             _lst = [i for i in range(len(patients)) if patients[i].isolate]
-            isolate_ind = list(np.random.choice(_lst, size=int(frac * len(_lst))))
+            isolate_ind = list(rng.choice(_lst, size=int(frac * len(_lst))))
             ind_lst = list(set(isolate_ind + ind_lst))
-        for i in ind_lst:
-            for j in ind_lst[i:]:
-                if i == j:
-                    continue
-                dist = Patient.distance(patients[i], patients[j])
-                if dist < MAX_DIST:
-                    dist = max(1.0, dist)  # prob maximizes within 1 unit
-                    patients[i].interact(patients[j], dist=dist)
-                    patients[j].interact(patients[i], dist=dist)
+        ind_lst = sorted(ind_lst)
+        x = np.array([patients[i].x for i in ind_lst])
+        y = np.array([patients[i].y for i in ind_lst])
+        for a, b, dist in zip(*find_pairs(x, y, max_dist=MAX_DIST)):
+            dist = max(1.0, dist)  # prob maximizes within 1 unit
+            patients[ind_lst[a]].interact(patients[ind_lst[b]], dist=dist, rng=rng)
+            patients[ind_lst[b]].interact(patients[ind_lst[a]], dist=dist, rng=rng)
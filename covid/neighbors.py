@@ -0,0 +1,264 @@
+"""Uniform-grid (cell-list) neighbor search"""
+# pylint: disable=C0103
+import numpy as np
+from scipy.spatial import cKDTree
+
+from covid.config import MAX_DIST
+
+# half of the 3x3 block of neighboring cells; together with the cell itself this visits every
+# unordered pair of adjacent cells exactly once
+_HALF_OFFSETS = [(1, -1), (1, 0), (1, 1), (0, 1)]
+
+
+def _empty_pairs():
+    return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64), np.empty(0, dtype=float)
+
+
+def _expand(first, start, count):
+    """
+    expand ranges of candidate partners into flat pair arrays
+
+    Parameters
+    ----------
+    first : np.ndarray
+        sorted position of the first member of each pair
+    start : np.ndarray
+        sorted position of the first candidate partner
+    count : np.ndarray
+        number of candidate partners
+
+    Returns
+    -------
+    tuple(np.ndarray, np.ndarray)
+    """
+    total = count.sum()
+    if total == 0:
+        return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64)
+    a = np.repeat(first, count)
+    offset = np.arange(total) - np.repeat(np.cumsum(count) - count, count)
+    b = np.repeat(start, count) + offset
+    return a, b
+
+
+def find_pairs(x, y, max_dist=MAX_DIST):
+    """
+    find every unordered pair of points closer than `max_dist`.
+
+    The points are binned into square cells of side `max_dist`, so that each point only needs to be
+    compared against the points in its own and the adjacent cells.  The grid is rebuilt on every
+    call.
+
+    Parameters
+    ----------
+    x : np.ndarray
+        x coordinates
+    y : np.ndarray
+        y coordinates
+    max_dist : float
+        interaction distance
+
+    Returns
+    -------
+    tuple(np.ndarray, np.ndarray, np.ndarray)
+        indices `i` and `j` (with `i < j`) of each pair and their separation, sorted by `(i, j)`
+    """
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+    n = x.size
+    if n < 2:
+        return _empty_pairs()
+
+    cx = np.floor((x - x.min()) / max_dist).astype(np.int64)
+    cy = np.floor((y - y.min()) / max_dist).astype(np.int64)
+    nx, ny = cx.max() + 1, cy.max() + 1
+    key = cx * ny + cy
+
+    order = np.argsort(key, kind="stable")
+    counts = np.bincount(key, minlength=nx * ny)
+    starts = np.cumsum(counts) - counts
+    pos = np.arange(n)
+    scx, scy = cx[order], cy[order]
+
+    # pairs within the same cell: each point pairs with the points sorted after it
+    own = key[order]
+    cand = [_expand(pos, pos + 1, starts[own] + counts[own] - pos - 1)]
+
+    for dx, dy in _HALF_OFFSETS:
+        ncx, ncy = scx + dx, scy + dy
+        valid = (ncx < nx) & (ncy >= 0) & (ncy < ny)
+        nkey = ncx[valid] * ny + ncy[valid]
+        cand.append(_expand(pos[valid], starts[nkey], counts[nkey]))
+
+    a = order[np.concatenate([c[0] for c in cand])]
+    b = order[np.concatenate([c[1] for c in cand])]
+    dist = np.hypot(x[a] - x[b], y[a] - y[b])
+    keep = dist < max_dist
+    i, j, dist = np.minimum(a, b)[keep], np.maximum(a, b)[keep], dist[keep]
+    srt = np.lexsort((j, i))
+    return i[srt], j[srt], dist[srt]
+
+
+def find_neighbors(x, y, qx, qy, max_dist=MAX_DIST):
+    """
+    find every point closer than `max_dist` to each of a few query points.  The points are binned
+    as in `find_pairs` and each query point is compared against the points in the 3x3 block of
+    cells around it, so the cost grows with the number of query points and their neighbors rather
+    than with the number of pairs among all the points.
+
+    Parameters
+    ----------
+    x : np.ndarray
+        x coordinates of the points
+    y : np.ndarray
+        y coordinates of the points
+    qx : np.ndarray
+        x coordinates of the query points
+    qy : np.ndarray
+        y coordinates of the query points
+    max_dist : float
+        interaction distance
+
+    Returns
+    -------
+    tuple(np.ndarray, np.ndarray, np.ndarray)
+        index `q` of the query point and `j` of the point in each pair, and their separation
+    """
+    x, y = np.asarray(x, dtype=float), np.asarray(y, dtype=float)
+    qx, qy = np.asarray(qx, dtype=float), np.asarray(qy, dtype=float)
+    if x.size == 0 or qx.size == 0:
+        return _empty_pairs()
+
+    x0, y0 = x.min(), y.min()
+    cx = np.floor((x - x0) / max_dist).astype(np.int64)
+    cy = np.floor((y - y0) / max_dist).astype(np.int64)
+    nx, ny = cx.max() + 1, cy.max() + 1
+    key = cx * ny + cy
+    order = np.argsort(key, kind="stable")
+    counts = np.bincount(key, minlength=nx * ny)
+    starts = np.cumsum(counts) - counts
+
+    qcx = np.floor((qx - x0) / max_dist).astype(np.int64)
+    qcy = np.floor((qy - y0) / max_dist).astype(np.int64)
+    q = np.arange(qx.size)
+    cand = []
+    for dx in (-1, 0, 1):
+        for dy in (-1, 0, 1):
+            ncx, ncy = qcx + dx, qcy + dy
+            valid = (ncx >= 0) & (ncx < nx) & (ncy >= 0) & (ncy < ny)
+            nkey = ncx[valid] * ny + ncy[valid]
+            cand.append(_expand(q[valid], starts[nkey], counts[nkey]))
+
+    a = np.concatenate([c[0] for c in cand])
+    b = order[np.concatenate([c[1] for c in cand])]
+    dist = np.hypot(qx[a] - x[b], qy[a] - y[b])
+    keep = dist < max_dist
+    return a[keep], b[keep], dist[keep]
+
+
+def has_neighbor(x, y, max_dist=MAX_DIST):
+    """
+    whether each point has another point closer than `max_dist`, from a k-d tree query of its
+    nearest neighbor, without listing the pairs
+
+    Parameters
+    ----------
+    x : np.ndarray
+    y : np.ndarray
+    max_dist : float
+
+    Returns
+    -------
+    np.ndarray
+        boolean mask
+    """
+    points = np.column_stack([np.asarray(x, dtype=float), np.asarray(y, dtype=float)])
+    if len(points) < 2:
+        return np.zeros(len(points), dtype=bool)
+    dist, _ = cKDTree(points).query(points, k=2, distance_upper_bound=max_dist)
+    return np.isfinite(dist[:, 1])
+
+
+# (shift, mask) of each step of spreading the lower 32 bits of an integer apart
+_SPREAD = [
+    (16, 0x0000FFFF0000FFFF),
+    (8, 0x00FF00FF00FF00FF),
+    (4, 0x0F0F0F0F0F0F0F0F),
+    (2, 0x3333333333333333),
+    (1, 0x5555555555555555),
+]
+
+
+def _spread_bits(v):
+    """insert a 0 bit after each of the lower 32 bits of `v` (unsigned 64-bit integers)"""
+    v = v & np.uint64(0xFFFFFFFF)
+    for shift, mask in _SPREAD:
+        v = (v | (v << np.uint64(shift))) & np.uint64(mask)
+    return v
+
+
+def morton_codes(x, y, bits=16):
+    """
+    position of each point along a Morton (Z-order) curve: the points are snapped to a grid of
+    `2 ** bits` by `2 ** bits` cells spanning their bounding box, and the bits of the column and row
+    of their cell are interleaved.  Points close to one another along the curve are close in space.
+
+    Parameters
+    ----------
+    x : np.ndarray
+    y : np.ndarray
+    bits : int (at most 32)
+        resolution of the grid
+
+    Returns
+    -------
+    np.ndarray
+        codes as unsigned 64-bit integers
+    """
+    x, y = np.asarray(x, dtype=float), np.asarray(y, dtype=float)
+    if x.size == 0:
+        return np.empty(0, dtype=np.uint64)
+    codes = []
+    for v in (x, y):
+        span = max(v.max() - v.min(), np.finfo(float).tiny)
+        cell = np.minimum((v - v.min()) / span * 2 ** bits, 2 ** bits - 1)
+        codes.append(_spread_bits(cell.astype(np.uint64)))
+    return codes[0] | (codes[1] << np.uint64(1))
+
+
+def morton_order(x, y, bits=16):
+    """
+    indices that sort points along a Morton curve, see `morton_codes`
+
+    Parameters
+    ----------
+    x : np.ndarray
+    y : np.ndarray
+    bits : int
+
+    Returns
+    -------
+    np.ndarray
+    """
+    return np.argsort(morton_codes(x, y, bits), kind="stable")
+
+
+def brute_force_pairs(x, y, max_dist=MAX_DIST):
+    """
+    reference O(n^2) implementation of `find_pairs`
+
+    Parameters
+    ----------
+    x : np.ndarray
+    y : np.ndarray
+    max_dist : float
+
+    Returns
+    -------
+    tuple(np.ndarray, np.ndarray, np.ndarray)
+    """
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+    i, j = np.triu_indices(x.size, k=1)
+    dist = np.hypot(x[i] - x[j], y[i] - y[j])
+    keep = dist < max_dist
+    return i[keep], j[keep], dist[keep]
@@ -0,0 +1,811 @@
+"""Array-backed population: the struct-of-arrays counterpart of a list of Patients"""
+# pylint: disable=C0103
+import heapq
+import itertools
+
+import numpy as np
+
+from covid.config import MAX_DIST, MAX_X, MAX_Y, MIN_X, MIN_Y
+from covid.model import severity_table
+from covid.kernels import NUMPY, get_backend
+from covid.neighbors import morton_order
+from covid.profiling import NULL_PROFILER
+
+# state codes
+SUSCEPTIBLE = 0
+INFECTED = 1
+IMMUNE = 2
+DEAD = 3
+
+# infection events, in the order they are applied within a step
+RECOVER = 0
+ISOLATE_ON = 1
+ISOLATE_OFF = 2
+DEATH = 3
+
+# per-step summary: the compartments reported by `count_cases`, followed by the step
+CASE_DTYPE = np.dtype(
+    [(k, np.int64) for k in ["infected", "dead", "immune", "total", "susceptible", "step"]]
+)
+
+_LOWER = np.array([MIN_X, MIN_Y])
+_UPPER = np.array([MAX_X, MAX_Y])
+
+
+def transmit(src, dst, dist, state, infection_prob, rng=None):
+    """
+    batched transmission over directed contacts.  A susceptible `dst` is infected by an infected
+    `src` with probability `infection_prob / dist**2` (capped at 1); all contacts are drawn with a
+    single call to the RNG and states are taken from the start of the step.
+
+    Parameters
+    ----------
+    src : np.ndarray
+        index of the person passing on the virus in each contact
+    dst : np.ndarray
+        index of the person receiving the virus in each contact
+    dist : np.ndarray
+        separation of each contact
+    state : np.ndarray
+        state codes
+    infection_prob : np.ndarray
+        infection probability of each person
+    rng : np.random.Generator or int (optional)
+        random number generator or seed
+
+    Returns
+    -------
+    np.ndarray
+        indices of the newly infected people
+    """
+    contact = (state[src] == INFECTED) & (state[dst] == SUSCEPTIBLE)
+    src, dst, dist = src[contact], dst[contact], dist[contact]
+    prob = np.minimum(1.0, infection_prob[src] / (dist ** 2.0))
+    hit = np.random.default_rng(rng).random(prob.size) < prob
+    return np.unique(dst[hit])
+
+
+class EventQueue:
+    """
+    Heap of scheduled events keyed by the time they are due.  Each entry is a batch of the ids of
+    everyone who undergoes the same kind of event at the same time.
+    """
+
+    def __init__(self):
+        self._heap = []
+        self._seq = itertools.count()
+
+    def __len__(self):
+        return len(self._heap)
+
+    def push(self, times, kind, ids):
+        """
+        schedule events
+
+        Parameters
+        ----------
+        times : np.ndarray
+            time each event is due
+        kind : int
+            kind of event
+        ids : np.ndarray
+            id of the person each event happens to
+        """
+        if ids.size == 0:
+            return
+        uniq, inv = np.unique(times, return_inverse=True)
+        order = np.argsort(inv, kind="stable")
+        for time, batch in zip(uniq, np.split(ids[order], np.cumsum(np.bincount(inv))[:-1])):
+            heapq.heappush(self._heap, (int(time), next(self._seq), kind, batch))
+
+    def pop_due(self, time):
+        """
+        remove every event due at or before `time`
+
+        Parameters
+        ----------
+        time : int
+
+        Returns
+        -------
+        dict
+            ids of the people undergoing each kind of event
+        """
+        due = {}
+        while self._heap and self._heap[0][0] <= time:
+            _, _, kind, batch = heapq.heappop(self._heap)
+            due.setdefault(kind, []).append(batch)
+        return {kind: np.concatenate(batches) for kind, batches in due.items()}
+
+    def to_arrays(self):
+        """
+        the heap as flat arrays, in heap order, e.g. to save it
+
+        Returns
+        -------
+        dict
+        """
+        heap = self._heap
+        return {
+            "times": np.array([e[0] for e in heap], dtype=np.int64),
+            "seqs": np.array([e[1] for e in heap], dtype=np.int64),
+            "kinds": np.array([e[2] for e in heap], dtype=np.int64),
+            "sizes": np.array([e[3].size for e in heap], dtype=np.int64),
+            "ids": np.concatenate([e[3] for e in heap] or [np.empty(0, dtype=np.int64)]),
+            "next_seq": np.array(max([e[1] for e in heap], default=-1) + 1),
+        }
+
+    @classmethod
+    def from_arrays(cls, arrays):
+        """
+        rebuild a queue saved with `to_arrays`
+
+        Parameters
+        ----------
+        arrays : dict
+
+        Returns
+        -------
+        EventQueue
+        """
+        queue = cls()
+        batches = np.split(arrays["ids"], np.cumsum(arrays["sizes"])[:-1])
+        queue._heap = [
+            (int(t), int(seq), int(kind), batch)
+            for t, seq, kind, batch in zip(
+                arrays["times"], arrays["seqs"], arrays["kinds"], batches
+            )
+        ]
+        queue._seq = itertools.count(int(arrays["next_seq"]))
+        return queue
+
+
+class Population:
+    """
+    A population of people stored as parallel NumPy arrays.
+
+    Each person has a position, velocity and a state code (`SUSCEPTIBLE`, `INFECTED`, `IMMUNE` or
+    `DEAD`) together with the parameters of their (possibly dormant) infection.  The infection timer
+    counts down from `int(infection_length)` once infected, exactly as `Virus.t` does.
+
+    As the severity of an infection follows a fixed curve, the time at which an infected person
+    will isolate, stop isolating, recover or die is known when they are infected.  These transitions
+    are scheduled on an `EventQueue` once, so that a step only touches the people with an event
+    due.  Events refer to people by their stable `ids`, which survive the removal of others.
+
+    Parameters
+    ----------
+    pos : array-like, shape (n, 2)
+        positions
+    vel : array-like, shape (n, 2)
+        velocities
+    infection_severity : array-like
+        severity scale of each infection
+    infection_length : array-like
+        infection length of each infection
+    infection_prob : float or array-like
+        infection probability
+    mortality_thresh : float or array-like
+        threshold for death
+    isolate_thresh : float or array-like
+        threshold before a person self-isolates
+    isolate_behavior : bool or array-like
+        whether a person proactively self-isolates
+
+    Attributes
+    ----------
+    kernels : types.SimpleNamespace
+        the movement and neighbor search kernels, chosen by setting `backend` (see
+        `covid.kernels.get_backend`)
+    """
+
+    kernels = NUMPY
+
+    _FIELDS = (
+        "pos",
+        "vel",
+        "infection_severity",
+        "curve_len",
+        "t",
+        "infection_prob",
+        "mortality_thresh",
+        "isolate_thresh",
+        "isolate_behavior",
+        "state",
+        "isolated",
+        "infected_at",
+        "ids",
+    )
+
+    def __init__(
+        self,
+        pos,
+        vel,
+        infection_severity,
+        infection_length,
+        infection_prob=1.0,
+        mortality_thresh=0.9,
+        isolate_thresh=0.4,
+        isolate_behavior=False,
+    ):
+        self.pos = np.array(pos, dtype=float).reshape(-1, 2)
+        self.vel = np.array(vel, dtype=float).reshape(-1, 2)
+        n = self.pos.shape[0]
+        infection_length = np.broadcast_to(np.asarray(infection_length, dtype=float), n)
+        self.infection_severity = np.broadcast_to(infection_severity, n).astype(float)
+        self.curve_len = np.ceil(infection_length).astype(np.int64)
+        self.t = infection_length.astype(np.int64)
+        self.infection_prob = np.broadcast_to(infection_prob, n).astype(float)
+        self.mortality_thresh = np.broadcast_to(mortality_thresh, n).astype(float)
+        self.isolate_thresh = np.broadcast_to(isolate_thresh, n).astype(float)
+        self.isolate_behavior = np.broadcast_to(isolate_behavior, n).astype(bool)
+        self.state = np.full(n, SUSCEPTIBLE, dtype=np.uint8)
+        self.isolated = self.isolate_behavior.copy()
+        # number of people in each state, kept up to date on every state transition
+        self.counts = np.array([n, 0, 0, 0], dtype=np.int64)
+        # the timer was at `t` at time `infected_at`
+        self.clock = 0
+        self.infected_at = np.zeros(n, dtype=np.int64)
+        self.events = EventQueue()
+        self.ids = np.arange(n, dtype=np.int64)
+        self._slot = np.arange(n, dtype=np.int64)  # slot of each id, -1 once removed
+        self._n_ids = n
+        # the fields are views of the first `len(self)` rows of over-allocated buffers
+        self._buffers = {field: getattr(self, field) for field in self._FIELDS}
+        self._set_size(n)
+
+    @classmethod
+    def from_patients(cls, patients):
+        """
+        build a population from a list of patients
+
+        Parameters
+        ----------
+        patients : List[Patient]
+
+        Returns
+        -------
+        Population
+        """
+        pop = cls(
+            pos=[(p.x, p.y) for p in patients],
+            vel=[(p.vx, p.vy) for p in patients],
+            infection_severity=[p.infection.infection_severity for p in patients],
+            infection_length=[p.infection.infection_length for p in patients],
+            infection_prob=[p.infection.infection_prob for p in patients],
+            mortality_thresh=[p.mortality_thresh for p in patients],
+            isolate_thresh=[p.isolate_thresh for p in patients],
+            isolate_behavior=[p.isolate_behavior for p in patients],
+        )
+        pop.t[:] = [p.infection.t for p in patients]
+        for code, flag in [
+            (IMMUNE, [p.infection.immune for p in patients]),
+            (INFECTED, [p.infection.active for p in patients]),
+            (DEAD, [p._is_dead for p in patients]),
+        ]:
+            pop.state[np.asarray(flag, dtype=bool)] = code
+        pop.counts = np.bincount(pop.state, minlength=4).astype(np.int64)
+        pop.isolated[:] = pop.isolate_behavior & (pop.state <= INFECTED) | (pop.state == DEAD)
+        pop._schedule(np.flatnonzero(pop.state == INFECTED))
+        return pop
+
+    def __len__(self):
+        return self._size
+
+    def to_arrays(self):
+        """
+        the full state of the population as arrays, e.g. to save it
+
+        Returns
+        -------
+        dict
+        """
+        arrays = {f"field/{field}": getattr(self, field) for field in self._FIELDS}
+        arrays.update({f"events/{k}": v for k, v in self.events.to_arrays().items()})
+        arrays["counts"] = self.counts
+        arrays["clock"] = np.array(self.clock)
+        arrays["slot"] = self._slot[: self._n_ids]
+        return arrays
+
+    @classmethod
+    def from_arrays(cls, arrays):
+        """
+        rebuild a population saved with `to_arrays`
+
+        Parameters
+        ----------
+        arrays : dict
+
+        Returns
+        -------
+        Population
+        """
+        n = len(arrays["field/state"])
+        pop = cls(
+            pos=np.zeros((n, 2)), vel=np.zeros((n, 2)), infection_severity=0.0, infection_length=0
+        )
+        for field in cls._FIELDS:
+            getattr(pop, field)[...] = arrays[f"field/{field}"]
+        pop.events = EventQueue.from_arrays(
+            {k.split("/", 1)[1]: v for k, v in arrays.items() if k.startswith("events/")}
+        )
+        pop.counts = np.array(arrays["counts"], dtype=np.int64)
+        pop.clock = int(arrays["clock"])
+        pop._slot = np.array(arrays["slot"], dtype=np.int64)
+        pop._n_ids = pop._slot.size
+        return pop
+
+    @property
+    def backend(self):
+        """name of the backend of the kernels, `"numpy"` or `"numba"`"""
+        return self.kernels.name
+
+    @backend.setter
+    def backend(self, name):
+        self.kernels = get_backend(name)
+
+    def _set_size(self, n):
+        """point the fields at the first `n` rows of the buffers"""
+        self._size = n
+        for field, buf in self._buffers.items():
+            setattr(self, field, buf[:n])
+
+    def _reserve(self, n):
+        """make room for `n` people, at least doubling the buffers whenever they grow"""
+        capacity = self._buffers["state"].shape[0]
+        if n > capacity:
+            capacity = max(n, 2 * capacity)
+            for field, buf in self._buffers.items():
+                new = np.empty((capacity,) + buf.shape[1:], dtype=buf.dtype)
+                new[: self._size] = buf[: self._size]
+                self._buffers[field] = new
+            self._set_size(self._size)
+
+    def _new_ids(self, k):
+        """issue `k` fresh ids"""
+        ids = self._n_ids + np.arange(k, dtype=np.int64)
+        self._n_ids += k
+        if self._n_ids > self._slot.size:
+            slot = np.full(max(self._n_ids, 2 * self._slot.size), -1, dtype=np.int64)
+            slot[: self._slot.size] = self._slot
+            self._slot = slot
+        return ids
+
+    @property
+    def timer(self):
+        """remaining time of every infection"""
+        return self.t - np.where(self.state == INFECTED, self.clock - self.infected_at, 0)
+
+    @property
+    def severity(self):
+        """current severity of every infection"""
+        table = severity_table(self.curve_len.max(initial=0))
+        ind = np.clip(self.curve_len - self.timer, 0, self.curve_len)
+        return self.infection_severity * table[self.curve_len, ind]
+
+    @property
+    def susceptible(self):
+        return self.state == SUSCEPTIBLE
+
+    @property
+    def is_dead(self):
+        return self.state == DEAD
+
+    @property
+    def isolate(self):
+        """
+        who is isolating:
+        - severity of infection forces person to isolate
+        - person follows self-isolation behavior while susceptible or sick
+        - person is dead
+        """
+        return self.isolated
+
+    @staticmethod
+    def _indices(ind):
+        """unique indices from a boolean mask or a list of indices"""
+        ind = np.asarray(ind)
+        if ind.dtype == bool:
+            return np.flatnonzero(ind)
+        return np.unique(ind.astype(np.int64))
+
+    def _transition(self, ind, code):
+        """move people `ind` (unique indices) to state `code`, updating the counters"""
+        self.counts -= np.bincount(self.state[ind], minlength=4)
+        self.counts[code] += ind.size
+        self.state[ind] = code
+
+    def _schedule(self, ind):
+        """
+        work out when the infections of `ind` (unique indices of people infected now, with `t` their
+        current timer) end, kill their host or force them to isolate, and queue those events.  `m`
+        counts the steps since now.
+        """
+        if ind.size == 0:
+            return
+        self.infected_at[ind] = self.clock
+        t0, n = self.t[ind][:, None], self.curve_len[ind][:, None]
+        m = np.arange(max(t0.max(), 1) + 1)
+        table = severity_table(n.max())
+        sev = self.infection_severity[ind][:, None] * table[n, np.clip(n - t0 + m, 0, n)]
+
+        # the virus runs its course after `t0` steps, unless it is fatal before then
+        m_recover = np.maximum(t0[:, 0], 1)
+        fatal = (sev > self.mortality_thresh[ind][:, None]) & (m >= 1) & (m < m_recover[:, None])
+        dies = fatal.any(axis=1)
+        m_end = np.where(dies, fatal.argmax(axis=1), m_recover)
+
+        # severity rises and falls once, so forced isolation is a single interval.  Patients
+        # decide whether to isolate before they die, so it lasts through the step of their death.
+        alive = (m < m_end[:, None]) | (dies[:, None] & (m == m_end[:, None]))
+        forced = (sev > self.isolate_thresh[ind][:, None]) & alive
+        m_on = forced.argmax(axis=1)
+        on = forced.any(axis=1)
+        relieved = ~forced & (m > m_on[:, None]) & alive
+        m_off = relieved.argmax(axis=1)
+        off = on & relieved.any(axis=1)
+
+        self.isolated[ind] = self.isolate_behavior[ind] | (on & (m_on == 0))
+        ids = self.ids[ind]
+        now = self.clock
+        self.events.push(now + m_end[dies], DEATH, ids[dies])
+        self.events.push(now + m_end[~dies], RECOVER, ids[~dies])
+        on &= m_on > 0
+        self.events.push(now + m_on[on], ISOLATE_ON, ids[on])
+        self.events.push(now + m_off[off], ISOLATE_OFF, ids[off])
+
+    def _due(self, due, kind):
+        """slots of the infected people still present that have an event of `kind` due"""
+        ids = due.get(kind, np.empty(0, dtype=np.int64))
+        ind = self._slot[ids]
+        ind = ind[ind >= 0]
+        return ind[self.state[ind] == INFECTED]
+
+    def infect(self, ind):
+        """infect the susceptible people among `ind`"""
+        ind = self._indices(ind)
+        ind = ind[self.state[ind] == SUSCEPTIBLE]
+        self._transition(ind, INFECTED)
+        self._schedule(ind)
+
+    def recover(self, ind):
+        """people recover and gain immunity"""
+        ind = self._indices(ind)
+        self._transition(ind, IMMUNE)
+        self.infection_severity[ind] = 0.0
+        self.isolated[ind] = False
+
+    def kill(self, ind):
+        """people die; the dead can no longer spread the virus"""
+        ind = self._indices(ind)
+        self._transition(ind, DEAD)
+        self.infection_severity[ind] = 0.0
+        self.isolated[ind] = True  # the dead can't move...
+
+    def step(self, dt=1):
+        """
+        progress everyone through one more unit of time: the infection events that are due are
+        applied, everyone who is not isolating moves and then the fatal infections that are due
+        kill their host.
+
+        Parameters
+        ----------
+        dt : int (default=1)
+            unit of time
+
+        Returns
+        -------
+        None
+        """
+        self.clock += dt
+        due = self.events.pop_due(self.clock)
+        self.recover(self._due(due, RECOVER))
+        self.isolated[self._due(due, ISOLATE_ON)] = True
+        off = self._due(due, ISOLATE_OFF)
+        self.isolated[off] = self.isolate_behavior[off]
+        self.move_it(dt)
+        self.kill(self._due(due, DEATH))
+
+    def move_it(self, dt):
+        """
+        move everyone who is not isolating one unit.  When near a wall, reflect the person.
+
+        Parameters
+        ----------
+        dt : float
+            time increment
+        """
+        self.kernels.move(self.pos, self.vel, ~self.isolate, _LOWER, _UPPER, dt)
+
+    def change_direction(self, ind, rng=None):
+        """Randomly change direction on interaction"""
+        rng = np.random.default_rng(rng)
+        self.vel[ind] = rng.normal(loc=0.0, scale=3.0, size=self.vel[ind].shape)
+
+    def find_interactions(
+        self,
+        partial_isolate=True,
+        frac=0.4,
+        max_dist=MAX_DIST,
+        rng=None,
+        mode="pairs",
+        profiler=NULL_PROFILER,
+    ):
+        """
+        interact everyone within `max_dist` of one another: everyone who interacts changes direction
+        and susceptible people may be infected by the infected people they meet.
+
+        Parameters
+        ----------
+        partial_isolate : bool
+            if true, include some fraction of the hermits at random in each step
+        frac : float < 1
+            fraction of hermits who still have to interact anyway this round
+        max_dist : float
+            max distance for interaction to be possible
+        rng : np.random.Generator or int (optional)
+            random number generator or seed
+        mode : str
+            `"pairs"` lists every pair of people who meet.  `"infectious"` only lists the
+            susceptible people around each infected person and tests everyone else for having any
+            neighbor at all, which is much cheaper while few people are infected.  Both draw the
+            same random numbers in the same order, so they give identical results.
+        profiler : Profiler (optional)
+            counts the contacts passed to `transmit`, the random numbers drawn and the
+            transmissions
+
+        Returns
+        -------
+        None
+        """
+        rng = np.random.default_rng(rng)
+        isolate = self.isolate
+        ind = np.flatnonzero(~isolate)
+        draws = 0
+        if partial_isolate:
+            hermits = self._hermits(isolate, frac, rng)
+            draws = hermits.size
+            ind = np.union1d(ind, hermits)
+        if mode == "pairs":
+            i, j, dist = self.kernels.find_pairs(*self._coords(ind), max_dist)
+            a, b = ind[i], ind[j]
+            src, dst, dist = np.concatenate([b, a]), np.concatenate([a, b]), np.tile(dist, 2)
+            met = np.union1d(a, b)
+        elif mode == "infectious":
+            src, dst, dist = self._infectious_contacts(ind, max_dist)
+            met = ind[self.kernels.has_neighbor(*self._coords(ind), max_dist)]
+        else:
+            raise ValueError(f"unknown interaction mode {mode!r}")
+        if profiler.enabled:
+            # transmit draws one number per contact from an infected to a susceptible person
+            contact = (self.state[src] == INFECTED) & (self.state[dst] == SUSCEPTIBLE)
+            profiler.count("contacts", src.size)
+            profiler.count("rng draws", draws + contact.sum() + 2 * met.size)
+        infected = transmit(
+            src=src,
+            dst=dst,
+            dist=np.maximum(1.0, dist),  # prob maximizes within 1 unit
+            state=self.state,
+            infection_prob=self.infection_prob,
+            rng=rng,
+        )
+        self.change_direction(met, rng)
+        self.infect(infected)
+        profiler.count("transmissions", infected.size)
+
+    def _hermits(self, isolate, frac, rng):
+        """
+        the isolating people who interact anyway: `int(frac * k)` draws, with replacement, among
+        the `k` people who isolate
+        """
+        hermits = np.flatnonzero(isolate)
+        return rng.choice(hermits, size=int(frac * hermits.size))
+
+    def _coords(self, ind):
+        """coordinates of the people `ind` in which neighbors are searched for"""
+        return self.pos[ind, 0], self.pos[ind, 1]
+
+    def _infectious_contacts(self, ind, max_dist):
+        """
+        contacts from an infected to a susceptible person among `ind` (sorted), in the order in
+        which the `"pairs"` mode of `find_interactions` passes them to `transmit`
+        """
+        state = self.state[ind]
+        inf, sus = ind[state == INFECTED], ind[state == SUSCEPTIBLE]
+        q, k, dist = self.kernels.find_neighbors(*self._coords(sus), *self._coords(inf), max_dist)
+        src, dst = inf[q], sus[k]
+        # contacts from the later person of a pair come first, sorted by pair
+        later = src > dst
+        srt = np.concatenate(
+            [
+                np.flatnonzero(later)[np.lexsort((src[later], dst[later]))],
+                np.flatnonzero(~later)[np.lexsort((dst[~later], src[~later]))],
+            ]
+        )
+        return src[srt], dst[srt], dist[srt]
+
+    def extend(self, other):
+        """
+        append people
+
+        Parameters
+        ----------
+        other : Population or List[Patient]
+        """
+        if not isinstance(other, Population):
+            other = Population.from_patients(other)
+        n, k = len(self), len(other)
+        self._reserve(n + k)
+        self._set_size(n + k)
+        for field in self._FIELDS:
+            getattr(self, field)[n:] = getattr(other, field)
+        # newcomers get fresh ids and their infections are rescheduled on this population's clock
+        self.t[n:] = other.timer
+        self.infected_at[n:] = self.clock
+        self.ids[n:] = self._new_ids(k)
+        self._slot[self.ids[n:]] = n + np.arange(k)
+        self.counts += other.counts
+        self._schedule(n + np.flatnonzero(other.state == INFECTED))
+
+    def remove(self, ind):
+        """
+        remove people in O(k) by moving the last people into the slots they leave behind.  This
+        changes the order of the people, but not their `ids`.
+
+        Parameters
+        ----------
+        ind : np.ndarray
+            boolean mask or indices of people to remove
+        """
+        ind = self._indices(ind)
+        k = ind.size
+        new_n = len(self) - k
+        self.counts -= np.bincount(self.state[ind], minlength=4)
+        self._slot[self.ids[ind]] = -1
+        # the holes below `new_n` are filled by the people at or above it who stay
+        stays = np.ones(k, dtype=bool)
+        stays[ind[ind >= new_n] - new_n] = False
+        movers = new_n + np.flatnonzero(stays)
+        holes = ind[ind < new_n]
+        for buf in self._buffers.values():
+            buf[holes] = buf[movers]
+        self._slot[self.ids[holes]] = holes
+        self._set_size(new_n)
+
+    def reorder(self, order):
+        """
+        permute the people in storage, keeping their `ids`
+
+        Parameters
+        ----------
+        order : np.ndarray
+            slot of the person to move into each slot, a permutation of `range(len(self))`
+        """
+        n = len(self)
+        for buf in self._buffers.values():
+            buf[:n] = buf[:n][order]
+        self._slot[self.ids] = np.arange(n)
+
+    def sort_spatially(self):
+        """
+        store people in the order of their position along a Morton curve (see
+        `neighbors.morton_order`), so that people who are close to one another are also close in
+        memory and the neighbor searches gather their coordinates from contiguous blocks rather
+        than all over the arrays.  People keep their `ids`, so counts, events and frames are
+        unaffected, but who gets which random number changes with the order.
+        """
+        self.reorder(morton_order(*self._coords(slice(None))))
+
+    def sample_alive(self, k, rng=None):
+        """
+        pick up to `k` distinct people at random among those who are not dead.  Draws are rejected
+        until enough are found, which costs O(k) unless most people are dead or `k` is a large part
+        of the population, in which case the living are listed instead.
+
+        Parameters
+        ----------
+        k : int
+        rng : np.random.Generator or int (optional)
+            random number generator or seed
+
+        Returns
+        -------
+        np.ndarray
+            indices of the chosen people
+        """
+        rng = np.random.default_rng(rng)
+        n, n_alive = len(self), len(self) - self.counts[DEAD]
+        k = min(k, n_alive)
+        if 2 * k > n_alive or 2 * n_alive < n:
+            return rng.choice(np.flatnonzero(self.state != DEAD), size=k, replace=False)
+        chosen = np.empty(0, dtype=np.int64)
+        while chosen.size < k:
+            draw = rng.integers(n, size=2 * (k - chosen.size))
+            draw = np.concatenate([chosen, draw[self.state[draw] != DEAD]])
+            # keep the first occurrence of each person, in the order they were drawn
+            _, first = np.unique(draw, return_index=True)
+            chosen = draw[np.sort(first)][:k]
+        return chosen
+
+    def count_cases(self):
+        """
+        number of people in each category; O(1) as the counters are kept up to date
+
+        Returns
+        -------
+        dict
+        """
+        counts = self.counts
+        return {
+            "infected": int(counts[INFECTED]),
+            "dead": int(counts[DEAD]),
+            "immune": int(counts[IMMUNE]),
+            "total": int(counts.sum() - counts[DEAD]),
+            "susceptible": int(counts[SUSCEPTIBLE]),
+        }
+
+    def get_points(self):
+        """
+        positions of the people in each category
+
+        Returns
+        -------
+        dict
+        """
+        dct = {
+            "dead": self.state == DEAD,
+            "infected": self.state == INFECTED,
+            "immune": self.state == IMMUNE,
+            "susceptible": self.state == SUSCEPTIBLE,
+        }
+        return {k: self.pos[v].T for k, v in dct.items()}
+
+
+class CaseHistory:
+    """
+    per-step time series of the number of people in each category, preallocated to the number of
+    steps of a run.
+
+    Parameters
+    ----------
+    steps : int
+        number of steps after the initial state
+    """
+
+    def __init__(self, steps):
+        self.data = np.zeros(steps + 1, dtype=CASE_DTYPE)
+        self.size = 0
+
+    def append(self, population, step):
+        """
+        record the current counts of `population`
+
+        Parameters
+        ----------
+        population : Population
+        step : int
+        """
+        c = population.counts
+        self.data[self.size] = (
+            c[INFECTED],
+            c[DEAD],
+            c[IMMUNE],
+            c.sum() - c[DEAD],
+            c[SUSCEPTIBLE],
+            step,
+        )
+        self.size += 1
+
+    def fill(self):
+        """repeat the last row until the end of the run, with consecutive steps"""
+        size = self.size
+        last = self.data[size - 1]
+        rest = self.data[size:]
+        rest[...] = last
+        rest["step"] = last["step"] + np.arange(1, len(rest) + 1)
+        self.size = len(self.data)
+
+    @property
+    def records(self):
+        """the rows recorded so far"""
+        return self.data[: self.size]
@@ -0,0 +1,92 @@
+"""Opt-in timing and counters of the phases of a simulation"""
+# pylint: disable=C0103
+import contextlib
+import time
+
+import pandas as pd
+
+
+class Profiler:
+    """
+    Records the wall time spent in each phase of every step, and counters such as the number of
+    contacts examined, random numbers drawn and transmissions.
+
+    Usage::
+
+        with profiler.phase("interactions"):
+            ...
+        profiler.count("transmissions", k)
+        profiler.end_step(step)
+    """
+
+    enabled = True
+
+    def __init__(self):
+        self.rows = []
+        self._row = {}
+
+    @contextlib.contextmanager
+    def phase(self, name):
+        """time the body of the `with` block as part of the phase `name` of the current step"""
+        t0 = time.perf_counter()
+        try:
+            yield
+        finally:
+            key = f"{name} time"
+            self._row[key] = self._row.get(key, 0.0) + time.perf_counter() - t0
+
+    def count(self, name, k):
+        """add `k` to the counter `name` of the current step"""
+        self._row[name] = self._row.get(name, 0) + int(k)
+
+    def end_step(self, step):
+        """close the current step"""
+        self._row["step"] = step
+        self.rows.append(self._row)
+        self._row = {}
+
+    def to_frame(self):
+        """
+        one row per step, with the time (in seconds) of each phase and each counter
+
+        Returns
+        -------
+        pd.DataFrame
+        """
+        df = pd.DataFrame(self.rows).fillna(0)
+        if df.empty:
+            return df
+        return df[["step"] + [col for col in df.columns if col != "step"]]
+
+
+class NullProfiler:
+    """stands in for `Profiler` when profiling is off; records nothing"""
+
+    enabled = False
+
+    def phase(self, name):
+        return contextlib.nullcontext()
+
+    def count(self, name, k):
+        pass
+
+    def end_step(self, step):
+        pass
+
+
+NULL_PROFILER = NullProfiler()
+
+
+def write_profile(df, path):
+    """
+    write profiles as JSON records if `path` ends in `.json`, otherwise as CSV
+
+    Parameters
+    ----------
+    df : pd.DataFrame
+    path : str
+    """
+    if str(path).endswith(".json"):
+        df.to_json(path, orient="records")
+    else:
+        df.to_csv(path, index=False)
@@ -0,0 +1,146 @@
+"""Columnar storage of the trajectories of individual realizations"""
+# pylint: disable=C0103
+import json
+import os
+import zipfile
+
+import numpy as np
+import pandas as pd
+
+
+class RealizationWriter:
+    """
+    Writes the trajectory of every realization to an `.npz` archive, one array per compartment and
+    chunk of realizations, tagged with the params and the ensemble seed.  Realizations are buffered
+    and appended to the archive `chunk_size` at a time; the archive is closed after every append,
+    so whatever was flushed stays readable if the run is interrupted.
+
+    The archive holds
+
+    * `meta`: JSON of `{"params": ..., "seed": ..., "columns": ...}`
+    * `step`: the steps
+    * `realization/<chunk>`: index of each realization in the chunk, shape `(k,)`
+    * `<column>/<chunk>`: counts of each realization in the chunk, shape `(k, steps)`
+
+    Parameters
+    ----------
+    path : str
+        `.npz` file, overwritten
+    params : dict (optional)
+        kwargs of `run_sim`
+    seed : int (optional)
+        entropy of the ensemble seed
+    chunk_size : int
+        number of realizations per chunk
+    """
+
+    def __init__(self, path, params=None, seed=None, chunk_size=64):
+        self.path = path
+        self.meta = {"params": params, "seed": None if seed is None else str(seed)}
+        self.chunk_size = chunk_size
+        self.n_chunks = 0
+        self.cols = None
+        self._index, self._buffer = [], []
+        if os.path.exists(path):
+            os.remove(path)
+
+    def _write(self, arrays):
+        with zipfile.ZipFile(self.path, mode="a", compression=zipfile.ZIP_DEFLATED) as zf:
+            for name, arr in arrays.items():
+                with zf.open(name + ".npy", mode="w", force_zip64=True) as f:
+                    np.lib.format.write_array(f, np.asanyarray(arr))
+
+    def append(self, i, result):
+        """
+        add one realization
+
+        Parameters
+        ----------
+        i : int
+            index of the realization
+        result : pd.DataFrame
+            output of `run_sim`
+        """
+        if self.cols is None:
+            self.cols = [col for col in result.columns if col != "step"]
+            meta = json.dumps(dict(self.meta, columns=self.cols), default=repr)
+            self._write({"meta": np.array(meta), "step": result["step"].to_numpy()})
+        self._index.append(i)
+        self._buffer.append(result[self.cols].to_numpy(dtype=np.int32))
+        if len(self._buffer) >= self.chunk_size:
+            self.flush()
+
+    def flush(self):
+        """append the buffered realizations to the archive"""
+        if not self._buffer:
+            return
+        values = np.stack(self._buffer)
+        chunk = f"{self.n_chunks:05d}"
+        arrays = {f"realization/{chunk}": np.array(self._index)}
+        arrays.update({f"{col}/{chunk}": values[:, :, j] for j, col in enumerate(self.cols)})
+        self._write(arrays)
+        self.n_chunks += 1
+        self._index, self._buffer = [], []
+
+    def close(self):
+        """flush the remaining realizations"""
+        self.flush()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def load_realizations(path, cols=None):
+    """
+    read realizations written by `RealizationWriter`.  Only the requested compartments are
+    decompressed.
+
+    Parameters
+    ----------
+    path : str
+    cols : List[str] (optional)
+        compartments to read, all by default
+
+    Returns
+    -------
+    tuple(dict, np.ndarray, dict)
+        array of shape `(realizations, steps)` of each compartment, ordered by realization index;
+        the steps; and the metadata, i.e. params, seed and columns
+    """
+    with np.load(path) as npz:
+        meta = json.loads(str(npz["meta"]))
+        steps = npz["step"]
+        chunks = sorted(k.split("/")[1] for k in npz.files if k.startswith("realization/"))
+        if not chunks:
+            empty = np.empty((0, len(steps)), dtype=np.int32)
+            return {col: empty for col in cols or meta["columns"]}, steps, meta
+        index = np.concatenate([npz[f"realization/{c}"] for c in chunks])
+        order = np.argsort(index, kind="stable")
+        values = {
+            col: np.concatenate([npz[f"{col}/{c}"] for c in chunks])[order]
+            for col in cols or meta["columns"]
+        }
+    return values, steps, meta
+
+
+def iter_realizations(path):
+    """
+    realizations written by `RealizationWriter` as `run_sim` outputs, e.g. to re-aggregate them
+    with `aggregate_realizations`
+
+    Parameters
+    ----------
+    path : str
+
+    Yields
+    ------
+    pd.DataFrame
+    """
+    values, steps, meta = load_realizations(path)
+    for r in range(len(values[meta["columns"][0]])):
+        df = pd.DataFrame({col: values[col][r] for col in meta["columns"]})
+        df["step"] = steps
+        yield df
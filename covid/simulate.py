@@ -4,9 +4,11 @@ import numpy as np
 
 from covid.config import MAX_X
 from covid.model import Patient, Virus
+from covid.ensemble import Ensemble, block_heads
+from covid.population import Population
 
 
-def new_patients(
+def _draw_people(
     n,
     mortality_thresh=0.95,
     isolate_thresh=0.5,
@@ -18,10 +20,11 @@ def new_patients(
     infection_prob_mean=1.0,
     infection_prob_std=1.0,
     proactive_isolate_frac=0.0,
+    rng=None,
     **kwargs,
 ):
     """
-    returns a list of new Patients.  Parameters are determined by statistical distributions:
+    draws the attributes of new people.  Parameters are determined by statistical distributions:
     - velocity and infection length, are normal distributions
     - severity and infection prob are the absolute value of a normal distributions clipped to the range [0, 1]
     - x, y coordinates of initial position are normal clipped to the dimensions of the box
@@ -53,32 +56,64 @@ def new_patients(
         fraction of people who proactively self-isolate by staying in place.
         a fraction of these people can interact with people who approach them
         but the rest do not interact at all.
+    rng : np.random.Generator or int (optional)
+        random number generator or seed
 
     Returns
     -------
-    List[Patient]
+    dict
+        the attributes of everyone, as taken by `Population`
 
     """
-    pos = 2 * MAX_X * np.random.random_sample(size=(n, 2)) - MAX_X
-    vel = np.random.normal(loc=0, scale=vel_std, size=(n, 2))
-    infect_len = np.fabs(
-        np.random.normal(loc=infection_length_mean, scale=infection_length_std, size=n)
-    )
+    rng = np.random.default_rng(rng)
+    pos = 2 * MAX_X * rng.random(size=(n, 2)) - MAX_X
+    vel = rng.normal(loc=0, scale=vel_std, size=(n, 2))
+    infect_len = np.fabs(rng.normal(loc=infection_length_mean, scale=infection_length_std, size=n))
 
-    proactive_isolate = np.random.choice(
+    proactive_isolate = rng.choice(
         [True, False], p=[proactive_isolate_frac, 1.0 - proactive_isolate_frac], size=n
     )
 
-    _severity = np.fabs(np.random.normal(loc=severity_score_mean, scale=severity_score_std, size=n))
+    _severity = np.fabs(rng.normal(loc=severity_score_mean, scale=severity_score_std, size=n))
     severity = np.clip(_severity, 0.0, 1.0)
 
-    _infect = np.fabs(np.random.normal(loc=infection_prob_mean, scale=infection_prob_std, size=n))
+    _infect = np.fabs(rng.normal(loc=infection_prob_mean, scale=infection_prob_std, size=n))
     infection_prob = np.clip(_infect, 0.0, 1.0)
+    return dict(
+        pos=pos,
+        vel=vel,
+        infection_severity=severity,
+        infection_length=infect_len,
+        infection_prob=infection_prob,
+        mortality_thresh=mortality_thresh,
+        isolate_thresh=isolate_thresh,
+        isolate_behavior=proactive_isolate,
+    )
+
+
+def new_patients(n, rng=None, **kwargs):
+    """
+    returns a list of new Patients
+
+    Parameters
+    ----------
+    n : int
+        num people
+    rng : np.random.Generator or int (optional)
+        random number generator or seed
+    kwargs :
+        parameters of the distributions, see `_draw_people`
+
+    Returns
+    -------
+    List[Patient]
+    """
+    people = _draw_people(n, rng=rng, **kwargs)
     infections = [
         Virus(
-            infection_severity=severity[i],
-            infection_length=infect_len[i],
-            infection_prob=infection_prob[i],
+            infection_severity=people["infection_severity"][i],
+            infection_length=people["infection_length"][i],
+            infection_prob=people["infection_prob"][i],
             active=False,
             immune=False,
         )
@@ -86,28 +121,78 @@ def new_patients(
     ]
     return [
         Patient(
-            x=pos[i][0],
-            y=pos[i][1],
-            vx=vel[i][0],
-            vy=vel[i][1],
+            x=people["pos"][i][0],
+            y=people["pos"][i][1],
+            vx=people["vel"][i][0],
+            vy=people["vel"][i][1],
             infection=infections[i],
-            mortality_thresh=mortality_thresh,
-            isolate_thresh=isolate_thresh,
-            isolate_behavior=proactive_isolate[i],
+            mortality_thresh=people["mortality_thresh"],
+            isolate_thresh=people["isolate_thresh"],
+            isolate_behavior=people["isolate_behavior"][i],
         )
         for i in range(n)
     ]
 
 
-def add_remove_patients(num_new, num_remove, patients, **kwargs):
+def new_population(n, rng=None, **kwargs):
+    """
+    returns new people as a `Population`, built straight from the sampled arrays without a
+    `Patient` per person.  Draws the same random numbers as `new_patients`, so with the same seed
+    it equals `Population.from_patients(new_patients(...))`.
+
+    Parameters
+    ----------
+    n : int
+        num people
+    rng : np.random.Generator or int (optional)
+        random number generator or seed
+    kwargs :
+        parameters of the distributions, see `_draw_people`
+
+    Returns
+    -------
+    Population
+    """
+    return Population(**_draw_people(n, rng=rng, **kwargs))
+
+
+def new_ensemble(sizes, rng=None, **kwargs):
+    """
+    returns new people for several realizations at once as an `Ensemble`, in consecutive blocks of
+    `sizes[r]` people for realization `r`
+
+    Parameters
+    ----------
+    sizes : np.ndarray
+        num people of each realization
+    rng : np.random.Generator or int (optional)
+        random number generator or seed
+    kwargs :
+        parameters of the distributions, see `_draw_people`
+
+    Returns
+    -------
+    Ensemble
+    """
+    sizes = np.asarray(sizes, dtype=np.int64)
+    realization = np.repeat(np.arange(sizes.size), sizes)
+    people = _draw_people(int(sizes.sum()), rng=rng, **kwargs)
+    return Ensemble(realization=realization, n_real=sizes.size, **people)
+
+
+def add_remove_patients(num_new, num_remove, patients, rng=None, **kwargs):
     """
     Add and remove patients
 
     Parameters
     ----------
     num_new : int
+        number of people to add
     num_remove : int
-    patients : List[Patient]
+        number of people who are not dead to remove at random
+    patients : List[Patient] or Population
+    rng : np.random.Generator or int (optional)
+        random number generator or seed
 
     Other Parameters
     ----------------
@@ -116,33 +201,81 @@ def add_remove_patients(num_new, num_remove, patients, **kwargs):
 
     Returns
     -------
-    List[Patient]
+    List[Patient] or Population
     """
+    rng = np.random.default_rng(rng)
     # extend the list with new patients
     if num_new > 0:
-        new_people = new_patients(num_new, **kwargs)
+        if isinstance(patients, Population):
+            new_people = new_population(num_new, rng=rng, **kwargs)
+        else:
+            new_people = new_patients(num_new, rng=rng, **kwargs)
         n_infect = kwargs.get("outside_infections", num_new // 100)
         randomly_infect(new_people, n_infect)
         patients.extend(new_people)
     # remove some patients
     if num_remove > 0:
-        np.random.shuffle(patients)
-        patients = [x for i, x in enumerate(patients) if i > num_remove or x.is_dead]
+        if isinstance(patients, Population):
+            patients.remove(patients.sample_alive(num_remove, rng))
+        else:
+            rng.shuffle(patients)
+            alive = [i for i, x in enumerate(patients) if not x.is_dead]
+            removed = set(alive[:num_remove])
+            patients = [x for i, x in enumerate(patients) if i not in removed]
     return patients
 
 
+def add_remove_ensemble(num_new, num_remove, ensemble, rng=None, **kwargs):
+    """
+    Add and remove people in every realization of an ensemble at once, as `add_remove_patients`
+    does for one
+
+    Parameters
+    ----------
+    num_new : np.ndarray
+        number of people to add to each realization
+    num_remove : np.ndarray
+        number of people who are not dead to remove at random from each realization
+    ensemble : Ensemble
+    rng : np.random.Generator or int (optional)
+        random number generator or seed
+
+    Other Parameters
+    ----------------
+    outside_infections: int (default nun_new // 100)
+        new infections coming from the people added to each realization
+
+    Returns
+    -------
+    Ensemble
+    """
+    rng = np.random.default_rng(rng)
+    num_new = np.asarray(num_new, dtype=np.int64)
+    if num_new.any():
+        new_people = new_ensemble(num_new, rng=rng, **kwargs)
+        n_infect = np.where(num_new > 0, kwargs.get("outside_infections", num_new // 100), 0)
+        new_people.infect(block_heads(num_new, n_infect))
+        ensemble.extend(new_people)
+    if np.any(num_remove):
+        ensemble.remove(ensemble.sample_alive_each(num_remove, rng))
+    return ensemble
+
+
 def randomly_infect(patient_lst, n_infect):
     """
     randomly infect elements of a list
 
     Parameters
     ----------
-    patient_lst : List[Patient]
+    patient_lst : List[Patient] or Population
     n_infect : int
 
     Returns
     -------
     None
     """
+    if isinstance(patient_lst, Population):
+        patient_lst.infect(np.arange(n_infect))
+        return
     for i in range(n_infect):
         patient_lst[i].infection.infect()
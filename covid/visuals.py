@@ -1,6 +1,9 @@
 """Visualization functions"""
 # pylint: disable=C0103,W0613
+import multiprocessing as mp
 import os
+import subprocess
+import tempfile
 
 import matplotlib
 import matplotlib.animation as animation
@@ -11,6 +14,7 @@ from matplotlib.colors import colorConverter as cc
 from matplotlib.lines import Line2D
 
 from covid.config import MAX_X, MAX_Y, MIN_X, MIN_Y, DATA_PATH
+from covid.frames import frame_points, load_frames
 
 
 def plot_mean_and_ci(mean, lb, ub, color_mean=None, color_shading=None):
@@ -95,59 +99,264 @@ def plot_curve(df, **kwargs):
 
 
 def augment(arr, numsteps):
-    xold, yold = arr[0], arr[1]
-    xnew = []
-    ynew = []
-    for i in range(len(xold) - 1):
-        x_steps = (xold[i + 1] - xold[i]) / numsteps
-        y_steps = (yold[i + 1] - yold[i]) / numsteps
-        for s in range(numsteps):
-            xnew = np.append(xnew, xold[i] + s * x_steps)
-            ynew = np.append(ynew, yold[i] + s * y_steps)
-    return np.array([xnew, ynew])
-
-
-def create_animation(all_steps_lst, total_frames=400, fps=20, **kwargs):
-    writer = animation.writers["ffmpeg"](fps=fps, metadata=dict(artist="Me"), bitrate=1800)
-    fig, ax = plt.subplots(1, figsize=(10, 10))
-    ax.set_xlim([MIN_X, MAX_X])
-    ax.set_ylim([MIN_Y, MAX_Y])
-    plt.title("Title", fontsize=20)
+    """
+    linearly interpolate `numsteps` points per interval along the last axis, e.g. to smooth the
+    trajectories `[x, y]` of one or many people
 
-    def _plot_group(ser, ax, *args, **kwargs):
-        if ser.size >= 2:
-            ax.plot(ser[0], ser[1], *args, **kwargs)
+    Parameters
+    ----------
+    arr : np.ndarray, shape (..., T)
+    numsteps : int
 
-    def plot_points(i):
-        alpha = 0.7
-        plt.cla()
-        dct = all_steps_lst[i]
-        _plot_group(dct["dead"], ax, marker="o", color="black", linestyle="", alpha=alpha)
-        _plot_group(dct["infected"], ax, marker="o", color="red", linestyle="", alpha=alpha)
-        _plot_group(dct["immune"], ax, marker="o", color="green", linestyle="", alpha=alpha)
-        _plot_group(
-            dct["susceptible"], ax, marker="o", color="purple", linestyle="", alpha=alpha,
-        )
+    Returns
+    -------
+    np.ndarray, shape (..., (T - 1) * numsteps)
+    """
+    arr = np.asarray(arr, dtype=float)
+    frac = np.arange(numsteps) / numsteps
+    sub = arr[..., :-1, None] + np.diff(arr, axis=-1)[..., None] * frac
+    return sub.reshape(arr.shape[:-1] + (-1,))
+
+
+def subframe(frames, k, substeps):
+    """
+    sub-frame `k` of frames recorded by `FrameRecorder`, with `substeps` sub-frames per step.
+    Everyone's position is interpolated between the two surrounding steps, while their state is
+    that of the earlier one.
+
+    Parameters
+    ----------
+    frames : np.ndarray, shape (steps + 1, n, 3)
+    k : int
+    substeps : int
+
+    Returns
+    -------
+    np.ndarray, shape (n, 3)
+    """
+    i, s = divmod(k, substeps)
+    frame = np.array(frames[i])
+    if s:
+        frame[:, :2] += (frames[i + 1, :, :2] - frame[:, :2]) * (s / substeps)
+    return frame
+
+
+def get_frame(all_steps_lst, i, substeps=1):
+    """
+    points of each category in frame `i` of the frames given to `create_animation`
+
+    Parameters
+    ----------
+    all_steps_lst : np.ndarray or List[dict]
+    i : int
+    substeps : int
+
+    Returns
+    -------
+    dict
+    """
+    if substeps > 1:
+        return frame_points(subframe(all_steps_lst, i, substeps))
+    dct = all_steps_lst[i]
+    if isinstance(dct, np.ndarray):
+        dct = frame_points(dct)
+    return dct
+
+
+class FrameRenderer:
+    """
+    Draws frames on a fixed set of artists: one scatter per category and a legend, all created
+    once.  Each frame only moves the points with `set_offsets`, so the artists it returns can be
+    blitted when the animation is shown interactively.  `Animation.save` draws the whole canvas
+    for every frame regardless, so a saved video only saves rebuilding the plot and legend.
+
+    Parameters
+    ----------
+    ax : matplotlib.axes.Axes
+    alpha : float
+        opacity of the points
+    """
+
+    # color and label of each category, in the order of the legend
+    STYLE = {
+        "susceptible": ("purple", "Susceptible"),
+        "infected": ("red", "Infected"),
+        "immune": ("green", "Recovered"),
+        "dead": ("black", "Dead"),
+    }
+    DRAW_ORDER = ["dead", "infected", "immune", "susceptible"]
+
+    def __init__(self, ax, alpha=0.7):
         ax.set_xlim([MIN_X, MAX_X])
         ax.set_ylim([MIN_Y, MAX_Y])
         ax.get_xaxis().set_ticks([])
         ax.get_yaxis().set_ticks([])
-
+        self.artists = {
+            k: ax.scatter([], [], marker="o", s=36, color=self.STYLE[k][0], alpha=alpha)
+            for k in self.DRAW_ORDER
+        }
         custom_lines = [
-            Line2D([0], [0], color="purple", lw=4, alpha=alpha),
-            Line2D([0], [0], color="red", lw=4, alpha=alpha),
-            Line2D([0], [0], color="green", lw=4, alpha=alpha),
-            Line2D([0], [0], color="black", lw=4, alpha=alpha),
+            Line2D([0], [0], color=color, lw=4, alpha=alpha) for color, _ in self.STYLE.values()
         ]
-
         ax.legend(
             custom_lines,
-            ["Susceptible", "Infected", "Recovered", "Dead"],
+            [label for _, label in self.STYLE.values()],
             loc="upper right",
             bbox_to_anchor=(1, 1),
         )
-        # ax.legend(loc='upper right', bbox_to_anchor=(0, 0))#, ncol=4, numpoints=1)
 
-    ani = matplotlib.animation.FuncAnimation(fig, plot_points, frames=total_frames, repeat=True)
+    def init(self):
+        """clear the points; the `init_func` of the animation"""
+        for artist in self.artists.values():
+            artist.set_offsets(np.empty((0, 2)))
+        return list(self.artists.values())
+
+    def draw(self, dct):
+        """
+        move the points to those of a frame
+
+        Parameters
+        ----------
+        dct : dict
+            points of each category, as returned by `get_points`
+
+        Returns
+        -------
+        list
+            the artists that changed
+        """
+        for k, artist in self.artists.items():
+            points = np.asarray(dct[k])
+            artist.set_offsets(points.T if points.size else np.empty((0, 2)))
+        return list(self.artists.values())
+
+
+def frame_chunks(total_frames, n_chunks):
+    """
+    split frames `0, ..., total_frames - 1` into `n_chunks` contiguous, nearly equal ranges
+
+    Parameters
+    ----------
+    total_frames : int
+    n_chunks : int
+
+    Returns
+    -------
+    List[tuple(int, int)]
+        `(start, stop)` of each non-empty chunk
+    """
+    bounds = np.linspace(0, total_frames, n_chunks + 1).round().astype(int)
+    return [(int(a), int(b)) for a, b in zip(bounds[:-1], bounds[1:]) if b > a]
+
+
+def _new_writer(fps):
+    return animation.writers["ffmpeg"](fps=fps, metadata=dict(artist="Me"), bitrate=1800)
+
+
+def _render(all_steps_lst, frames, substeps, fps, output_file):
+    """render the frames numbered `frames` of `all_steps_lst` to `output_file`"""
+    fig, ax = plt.subplots(1, figsize=(10, 10))
+    renderer = FrameRenderer(ax)
+
+    def plot_points(i):
+        return renderer.draw(get_frame(all_steps_lst, i, substeps))
+
+    ani = matplotlib.animation.FuncAnimation(
+        fig,
+        plot_points,
+        init_func=renderer.init,
+        frames=frames,
+        repeat=True,
+        # only used when shown: `save` draws the whole canvas for every frame
+        blit=True,
+    )
+    ani.save(output_file, writer=_new_writer(fps))
+    plt.close(fig)
+
+
+def _render_segment(job):
+    """
+    render frames `start, ..., stop - 1` to their own video; the unit of work of
+    `create_animation` with `n_proc > 1`.  Memory-mapped frames are reopened from their file
+    rather than sent to the worker, and otherwise only the steps the segment needs are sent.
+    """
+    source, first_step, start, stop, substeps, fps, output_file = job
+    if isinstance(source, str):
+        last_step = (stop - 1) // substeps + (1 if substeps > 1 else 0)
+        source = load_frames(source)[first_step : last_step + 1]
+    offset = first_step * substeps
+    _render(source, range(start - offset, stop - offset), substeps, fps, output_file)
+    return output_file
+
+
+def _segment_jobs(all_steps_lst, total_frames, substeps, n_chunks, fps, tmpdir):
+    """one job for `_render_segment` per chunk of frames"""
+    path = getattr(all_steps_lst, "filename", None)
+    n_steps = len(all_steps_lst)
+    jobs = []
+    for k, (start, stop) in enumerate(frame_chunks(total_frames, n_chunks)):
+        first_step = start // substeps
+        last_step = min((stop - 1) // substeps + (1 if substeps > 1 else 0), n_steps - 1)
+        if isinstance(all_steps_lst, np.memmap) and path:
+            source = str(path)
+        else:
+            source = all_steps_lst[first_step : last_step + 1]
+        output_file = os.path.join(tmpdir, f"segment_{k:04d}.mp4")
+        jobs.append((source, first_step, start, stop, substeps, fps, output_file))
+    return jobs
+
+
+def concat_videos(segments, output_file):
+    """
+    join videos encoded with the same settings into one, without re-encoding
+
+    Parameters
+    ----------
+    segments : List[str]
+        video files, in order
+    output_file : str
+    """
+    list_file = output_file + ".segments.txt"
+    with open(list_file, "w") as f:
+        f.writelines(f"file '{os.path.abspath(s)}'\n" for s in segments)
+    try:
+        ffmpeg = matplotlib.rcParams["animation.ffmpeg_path"]
+        cmd = [ffmpeg, "-y", "-loglevel", "error", "-f", "concat", "-safe", "0", "-i", list_file]
+        subprocess.run(cmd + ["-c", "copy", output_file], check=True)
+    finally:
+        os.remove(list_file)
+
+
+def create_animation(all_steps_lst, total_frames=400, fps=20, substeps=1, n_proc=1, **kwargs):
+    """
+    animate people moving around
+
+    Parameters
+    ----------
+    all_steps_lst : np.ndarray or List[dict]
+        frames recorded by `FrameRecorder` (possibly memory-mapped; each frame is only read when
+        it is drawn) or a list of the outputs of `get_points`
+    total_frames : int
+        number of steps to animate
+    fps : int
+        frames per second
+    substeps : int
+        number of frames drawn per step, interpolating positions in between (see `subframe`).
+        Requires recorded frames.
+    n_proc : int
+        number of processes.  With more than one, the frames are split into `n_proc` contiguous
+        segments which are rendered to separate videos in parallel and then joined with ffmpeg.
+    """
+    if substeps > 1 and not isinstance(all_steps_lst, np.ndarray):
+        raise ValueError("substeps need frames recorded by FrameRecorder")
     output_file = kwargs.get("output_file", os.path.join(DATA_PATH, "covid_interactions.mp4"))
-    ani.save(output_file, writer=writer)
+    n_frames = total_frames * substeps
+    if n_proc <= 1:
+        _render(all_steps_lst, n_frames, substeps, fps, output_file)
+        return
+
+    with tempfile.TemporaryDirectory(dir=os.path.dirname(os.path.abspath(output_file))) as tmpdir:
+        jobs = _segment_jobs(all_steps_lst, n_frames, substeps, n_proc, fps, tmpdir)
+        with mp.Pool(n_proc) as pool:
+            segments = pool.map(_render_segment, jobs, chunksize=1)
+        concat_videos(segments, output_file)
@@ -1,13 +1,28 @@
 """run simulations and visualize results"""
+import hashlib
+import itertools
+import json
 import multiprocessing as mp
 import os
 
 import numpy as np
 import pandas as pd
 
+from covid.aggregate import StreamingAggregator
+from covid.checkpoint import load_checkpoint, save_checkpoint
 from covid.config import DATA_PATH
-from covid.model import Patient
-from covid.simulate import add_remove_patients, new_patients, randomly_infect
+from covid.ensemble import EnsembleHistory, block_heads
+from covid.frames import FrameRecorder, load_frames
+from covid.population import INFECTED, CaseHistory, Population
+from covid.profiling import NULL_PROFILER, Profiler, write_profile
+from covid.results import RealizationWriter
+from covid.simulate import (
+    add_remove_ensemble,
+    add_remove_patients,
+    new_ensemble,
+    new_population,
+    randomly_infect,
+)
 from covid.visuals import create_animation, plot_curve  # , plot_points
 
 
@@ -16,7 +31,7 @@ def count_cases(patients, step=0, dct=None):
 
     Parameters
     ----------
-    patients : list
+    patients : List[Patient] or Population
     step : int
     dct : dict (optional)
 
@@ -26,16 +41,33 @@ def count_cases(patients, step=0, dct=None):
     """
     if not dct:
         dct = {k: [] for k in ["infected", "dead", "immune", "total", "susceptible", "step"]}
-    dct["infected"].append(len([x for x in patients if x.infection.active]))
-    dct["dead"].append(len([x for x in patients if x._is_dead]))
-    dct["immune"].append(len([x for x in patients if x.infection.immune and not x._is_dead]))
-    dct["total"].append(len([x for x in patients if not x._is_dead]))
-    dct["susceptible"].append(len([x for x in patients if x.susceptible]))
+    if isinstance(patients, Population):
+        for k, v in patients.count_cases().items():
+            dct[k].append(v)
+    else:
+        dct["infected"].append(len([x for x in patients if x.infection.active]))
+        dct["dead"].append(len([x for x in patients if x._is_dead]))
+        dct["immune"].append(len([x for x in patients if x.infection.immune and not x._is_dead]))
+        dct["total"].append(len([x for x in patients if not x._is_dead]))
+        dct["susceptible"].append(len([x for x in patients if x.susceptible]))
     dct["step"].append(step)
     return dct
 
 
-def run_sim(n, steps, mu_add_at_step, mu_remove_at_step, initially_infected, **kwargs):
+def run_sim(
+    n,
+    steps,
+    mu_add_at_step,
+    mu_remove_at_step,
+    initially_infected,
+    rng=None,
+    profiler=NULL_PROFILER,
+    backend="numpy",
+    checkpoint=None,
+    checkpoint_every=None,
+    resume_from=None,
+    **kwargs,
+):
     """
     run simulation.  adding or removing people at each step is a poisson process.
 
@@ -49,40 +81,297 @@ def run_sim(n, steps, mu_add_at_step, mu_remove_at_step, initially_infected, **k
         mean to randomly remove non-dead people at each step
     initially_infected : int
         number of initially infected poeple
+    rng : np.random.Generator or int (optional)
+        random number generator or seed.  The same seed reproduces the same realization.
+    profiler : Profiler (optional)
+        records the time spent interacting, adding and removing people, stepping and counting
+        cases at every step, along with the counters of `Population.find_interactions`
+    backend : str
+        `"numpy"` or `"numba"`, the backend of the movement and neighbor search kernels (see
+        `covid.kernels`).  Falls back to NumPy if Numba isn't installed.
+    checkpoint : str (optional)
+        `.npz` file to save the state of the simulation to every `checkpoint_every` steps (see
+        `save_checkpoint`)
+    checkpoint_every : int (optional)
+        number of steps between checkpoints
+    resume_from : str (optional)
+        checkpoint to carry on from instead of starting over.  Its random state is restored, so
+        with the same params the result is the same as that of the uninterrupted run.
+
+    Other Parameters
+    ----------------
+    stop_when_extinct : bool (default True)
+        once nobody is infected and no more infections can come from outside (see
+        `add_remove_patients`), stop simulating interactions and movement, which can no longer
+        change the counts.  People are still added and removed; if nobody will be either, the
+        remaining rows are filled with the final counts.  Either way the output has `steps + 1`
+        rows.
+    interaction_mode : str (default "infectious")
+        how interactions are found, see `Population.find_interactions`
+    sort_every : int (optional)
+        reorder the people in storage along a Morton curve of their positions every `sort_every`
+        steps (see `Population.sort_spatially`), which speeds up the neighbor searches of large
+        populations.  Results are statistically the same but not identical to those of unsorted
+        runs with the same seed.
 
     Returns
     -------
     pd.DataFrame
 
     """
-    add_at_step = np.random.poisson(mu_add_at_step, steps)
-    remove_at_step = np.random.poisson(mu_remove_at_step, steps)
     partial_isolate_frac = kwargs.get("frac", 0.1)
-    patients = new_patients(n, **kwargs)
+    stop_when_extinct = kwargs.get("stop_when_extinct", True)
+    interaction_mode = kwargs.get("interaction_mode", "infectious")
+    sort_every = kwargs.get("sort_every")
+    if resume_from:
+        state = load_checkpoint(resume_from)
+        rng, patients, history, start = (state[k] for k in ["rng", "population", "history", "step"])
+        add_at_step, remove_at_step = state["add_at_step"], state["remove_at_step"]
+        if add_at_step.size != steps:
+            raise ValueError(f"{resume_from} is a checkpoint of a run of {add_at_step.size} steps")
+    else:
+        rng = np.random.default_rng(rng)
+        add_at_step = rng.poisson(mu_add_at_step, steps)
+        remove_at_step = rng.poisson(mu_remove_at_step, steps)
+        patients = new_population(n, rng=rng, **kwargs)
+        randomly_infect(patients, initially_infected)
+        history = CaseHistory(steps)
+        history.append(patients, step=0)
+        start = 0
+    patients.backend = backend
+
+    # whether people arriving at this or a later step may bring infections, and whether anyone
+    # will be added or removed at all
+    outside = np.where(add_at_step > 0, kwargs.get("outside_infections", add_at_step // 100), 0)
+    inflow = np.cumsum((outside > 0)[::-1])[::-1] > 0
+    churn = np.cumsum((add_at_step + remove_at_step)[::-1])[::-1] > 0
+
+    for step in range(start, steps):
+        extinct = stop_when_extinct and patients.counts[INFECTED] == 0 and not inflow[step]
+        if extinct and not churn[step]:
+            history.fill()
+            break
+        if sort_every and step % sort_every == 0:
+            with profiler.phase("sort"):
+                patients.sort_spatially()
+        if not extinct:
+            with profiler.phase("interactions"):
+                patients.find_interactions(
+                    partial_isolate=True,
+                    frac=partial_isolate_frac,
+                    rng=rng,
+                    mode=interaction_mode,
+                    profiler=profiler,
+                )
+        with profiler.phase("add_remove"):
+            patients = add_remove_patients(
+                num_new=add_at_step[step],
+                num_remove=min(remove_at_step[step], len(patients)),
+                patients=patients,
+                rng=rng,
+                **kwargs,
+            )
+
+        if not extinct:
+            with profiler.phase("step"):
+                patients.step()
+        with profiler.phase("count_cases"):
+            history.append(patients, step=step + 1)
+        profiler.count("people", len(patients))
+        profiler.end_step(step + 1)
+        if checkpoint and checkpoint_every and (step + 1) % checkpoint_every == 0:
+            save_checkpoint(
+                checkpoint,
+                patients,
+                history,
+                rng,
+                step + 1,
+                add_at_step=add_at_step,
+                remove_at_step=remove_at_step,
+            )
+
+    df = pd.DataFrame(history.records)
+    return df
+
+
+def run_batch(
+    n,
+    steps,
+    mu_add_at_step,
+    mu_remove_at_step,
+    initially_infected,
+    n_real,
+    rng=None,
+    profiler=NULL_PROFILER,
+    backend="numpy",
+    **kwargs,
+):
+    """
+    run `n_real` independent realizations of `run_sim` together, as one `Ensemble`, so that every
+    step advances all of them with the same vectorized operations.  For small populations this
+    costs about as much as a single run of `n * n_real` people instead of `n_real` runs.
+
+    The realizations follow the same model as `run_sim` but share one random stream, so they are
+    statistically equivalent to, not the same as, `n_real` calls of `run_sim`.  Interactions are
+    skipped and the remaining steps filled once the epidemic is extinct in every realization (see
+    `run_sim`).
 
-    randomly_infect(patients, initially_infected)
+    Parameters
+    ----------
+    n : int
+    steps : int
+    mu_add_at_step : float
+    mu_remove_at_step : float
+    initially_infected : int
+    n_real : int
+        number of realizations
+    rng : np.random.Generator or int (optional)
+        random number generator or seed
+    profiler : Profiler (optional)
+    backend : str
+        see `run_sim`
+    kwargs :
+        see `run_sim`
 
-    count_dct = count_cases(patients)
+    Returns
+    -------
+    List[pd.DataFrame]
+        the output of `run_sim` for each realization
+    """
+    rng = np.random.default_rng(rng)
+    add_at_step = rng.poisson(mu_add_at_step, (n_real, steps))
+    remove_at_step = rng.poisson(mu_remove_at_step, (n_real, steps))
+    partial_isolate_frac = kwargs.get("frac", 0.1)
+    stop_when_extinct = kwargs.get("stop_when_extinct", True)
+    interaction_mode = kwargs.get("interaction_mode", "infectious")
+    sort_every = kwargs.get("sort_every")
+    sizes = np.full(n_real, n)
+    patients = new_ensemble(sizes, rng=rng, **kwargs)
+    patients.backend = backend
+    patients.infect(block_heads(sizes, initially_infected))
+
+    outside = np.where(add_at_step > 0, kwargs.get("outside_infections", add_at_step // 100), 0)
+    inflow = np.cumsum((outside > 0).any(axis=0)[::-1])[::-1] > 0
+    churn = np.cumsum((add_at_step + remove_at_step).sum(axis=0)[::-1])[::-1] > 0
+
+    history = EnsembleHistory(n_real, steps)
+    history.append(patients, step=0)
     for step in range(steps):
-        Patient.find_interactions(patients, partial_isolate=True, frac=partial_isolate_frac)
-        patients = add_remove_patients(
-            num_new=add_at_step[step],
-            num_remove=min(remove_at_step[step], len(patients)),
-            patients=patients,
-            **kwargs,
-        )
+        extinct = stop_when_extinct and patients.counts[INFECTED] == 0 and not inflow[step]
+        if extinct and not churn[step]:
+            history.fill()
+            break
+        if sort_every and step % sort_every == 0:
+            with profiler.phase("sort"):
+                patients.sort_spatially()
+        if not extinct:
+            with profiler.phase("interactions"):
+                patients.find_interactions(
+                    partial_isolate=True,
+                    frac=partial_isolate_frac,
+                    rng=rng,
+                    mode=interaction_mode,
+                    profiler=profiler,
+                )
+        with profiler.phase("add_remove"):
+            add_remove_ensemble(
+                num_new=add_at_step[:, step],
+                num_remove=remove_at_step[:, step],
+                ensemble=patients,
+                rng=rng,
+                **kwargs,
+            )
+
+        if not extinct:
+            with profiler.phase("step"):
+                patients.step()
+        with profiler.phase("count_cases"):
+            history.append(patients, step=step + 1)
+        profiler.count("people", len(patients))
+        profiler.end_step(step + 1)
+
+    return [pd.DataFrame(history.records(r)) for r in range(n_real)]
+
+
+def realization_rng(seed, i):
+    """
+    random number generator of realization `i` of an ensemble seeded with `seed`.  Equal to the
+    `i`th stream spawned by `run_all`, so any single realization can be replayed with
+    `run_sim(rng=realization_rng(seed, i), **kwds)`.
 
-        for p in patients:
-            p.step()
-        count_dct = count_cases(patients, step=step + 1, dct=count_dct)
+    Parameters
+    ----------
+    seed : int
+        seed of the ensemble
+    i : int
+        index of the realization
 
-    df = pd.DataFrame(count_dct)
-    return df
+    Returns
+    -------
+    np.random.Generator
+    """
+    return np.random.default_rng(np.random.SeedSequence(seed, spawn_key=(i,)))
+
+
+def _run_realization(job):
+    """run one realization of `run_sim` on its own RNG stream; the unit of work of `run_all`"""
+    i, seed_seq, kwds, profile = job
+    profiler = Profiler() if profile else NULL_PROFILER
+    df = run_sim(rng=np.random.default_rng(seed_seq), profiler=profiler, **kwds)
+    return i, df, profiler.to_frame() if profile else None
 
 
-def run_all(kwds, output_file, n_proc=8, n_iter=5, **plot_kwargs):
+def _run_batch(job):
+    """
+    run a batch of realizations together with `run_batch`; the unit of work of `run_all` with
+    `batch_size`.  The profile of the batch goes with its first realization.
+    """
+    first, count, seed_seq, kwds, profile = job
+    profiler = Profiler() if profile else NULL_PROFILER
+    dfs = run_batch(n_real=count, rng=np.random.default_rng(seed_seq), profiler=profiler, **kwds)
+    prof = profiler.to_frame() if profile else None
+    return [(first + r, df, prof if r == 0 else None) for r, df in enumerate(dfs)]
+
+
+def aggregate_realizations(results, n_iter=None):
+    """
+    aggregate realizations step by step, consuming them as they arrive.  Only running statistics
+    are kept (see `StreamingAggregator`), so memory doesn't grow with the number of realizations.
+
+    Parameters
+    ----------
+    results : Iterable[pd.DataFrame]
+        outputs of `run_sim`, in any order
+    n_iter : int (optional)
+        number of realizations expected
+
+    Returns
+    -------
+    pd.DataFrame
+        mean, median, std and count of each compartment at each step
+    """
+    aggregator = StreamingAggregator()
+    for result in results:
+        aggregator.update(result)
+    if n_iter is not None and aggregator.count != n_iter:
+        raise ValueError(f"expected {n_iter} realizations, got {aggregator.count}")
+    return aggregator.result()
+
+
+def run_all(
+    kwds,
+    output_file,
+    n_proc=8,
+    n_iter=5,
+    seed=None,
+    chunksize=1,
+    realizations_file=None,
+    profile_file=None,
+    batch_size=None,
+    **plot_kwargs,
+):
     """
-    run `run_sim` `n_iter` times
+    run `run_sim` `n_iter` times in parallel and aggregate the realizations step by step
 
     Parameters
     ----------
@@ -94,31 +383,213 @@ def run_all(kwds, output_file, n_proc=8, n_iter=5, **plot_kwargs):
         num processes
     n_iter : int
         num iterations to run in parallel
+    seed : int (optional)
+        seed of the ensemble.  Each realization runs on its own independent stream spawned from it
+        (see `realization_rng`).
+    chunksize : int
+        number of realizations sent to a worker at a time
+    realizations_file : str (optional)
+        `.npz` file to also write every realization to, tagged with `kwds` and the seed (see
+        `RealizationWriter` and `load_realizations`)
+    profile_file : str (optional)
+        profile every realization (see `Profiler`) and write the profiles, one row per realization
+        and step, to this `.csv` or `.json` file
+    batch_size : int (optional)
+        simulate the realizations in batches of this many at once with `run_batch`, which is much
+        faster for small populations.  Each batch runs on its own stream spawned from `seed`, so
+        realizations no longer match `realization_rng`.  Profiles are then per batch.
 
     Returns
     -------
     None
     """
-    pool = mp.Pool(processes=min(mp.cpu_count(), n_proc))
-    results = [pool.apply(run_sim, args=(), kwds=kwds) for x in range(n_iter)]
-    df = pd.concat(results, axis=0).groupby("step").agg(["mean", "median", "std", "count"])
-    df.columns = [" ".join(col).strip() for col in df.columns.values]
+    seed_seq = np.random.SeedSequence(seed)
+    profile = bool(profile_file)
+    if batch_size:
+        firsts = range(0, n_iter, batch_size)
+        seeds = seed_seq.spawn(len(firsts))
+        jobs = [(i, min(batch_size, n_iter - i), s, kwds, profile) for i, s in zip(firsts, seeds)]
+    else:
+        jobs = [(i, s, kwds, profile) for i, s in enumerate(seed_seq.spawn(n_iter))]
+    writer = None
+    if realizations_file:
+        writer = RealizationWriter(realizations_file, params=kwds, seed=seed_seq.entropy)
+    profiles = []
+
+    def arrived(results):
+        for i, result, prof in results:
+            if writer:
+                writer.append(i, result)
+            if prof is not None:
+                profiles.append(prof.assign(realization=i))
+            yield result
+
+    with mp.Pool(processes=min(mp.cpu_count(), n_proc)) as pool:
+        # consume realizations as they finish, in whatever order that happens
+        if batch_size:
+            batches = pool.imap_unordered(_run_batch, jobs, chunksize)
+            results = itertools.chain.from_iterable(batches)
+        else:
+            results = pool.imap_unordered(_run_realization, jobs, chunksize)
+        df = aggregate_realizations(arrived(results), n_iter)
+        pool.close()
+        pool.join()
+    if writer:
+        writer.close()
+    if profile:
+        write_profile(pd.concat(profiles).sort_values(["realization", "step"]), profile_file)
     df.to_csv(output_file, header=True)
     plot_curve(df, **plot_kwargs)
 
 
+def param_grid(grid):
+    """
+    expand a parameter grid
+
+    Parameters
+    ----------
+    grid : dict or List[dict]
+        either a dict mapping each parameter to the list of values to try, in which case every
+        combination is returned, or an explicit list of param dicts
+
+    Returns
+    -------
+    List[dict]
+    """
+    if isinstance(grid, dict):
+        keys = list(grid)
+        return [dict(zip(keys, values)) for values in itertools.product(*grid.values())]
+    return [dict(cell) for cell in grid]
+
+
+def cache_key(kwds, entropy, i):
+    """
+    hash of the params, ensemble seed and realization index identifying one cached realization
+
+    Parameters
+    ----------
+    kwds : dict
+        kwargs for `run_sim`
+    entropy : int
+        entropy of the ensemble seed
+    i : int
+        index of the realization
+
+    Returns
+    -------
+    str
+    """
+    blob = json.dumps({"kwds": kwds, "seed": entropy, "i": i}, sort_keys=True, default=repr)
+    return hashlib.sha1(blob.encode()).hexdigest()
+
+
+def _run_cached(job):
+    """run one realization of a sweep and cache it on disk; the unit of work of `run_sweep`"""
+    cell, i, kwds, seed_seq, path, checkpoint_every, resume = job
+    checkpoint = path[: -len(".npy")] + ".ckpt.npz"
+    resume_from = checkpoint if resume and os.path.exists(checkpoint) else None
+    df = run_sim(
+        rng=np.random.default_rng(seed_seq),
+        checkpoint=checkpoint,
+        checkpoint_every=checkpoint_every,
+        resume_from=resume_from,
+        **kwds,
+    )
+    tmp = path + ".tmp.npy"
+    np.save(tmp, df.to_records(index=False))
+    os.replace(tmp, path)
+    if os.path.exists(checkpoint):
+        os.remove(checkpoint)
+    return cell, i, df
+
+
+def run_sweep(
+    kwds,
+    grid,
+    cache_dir,
+    n_proc=8,
+    n_iter=5,
+    seed=None,
+    chunksize=1,
+    checkpoint_every=None,
+    resume=True,
+):
+    """
+    run `n_iter` realizations of `run_sim` for every cell of a parameter grid on one shared pool.
+
+    Every realization is cached in `cache_dir` under a hash of its params, the ensemble seed and
+    its index, so rerunning or extending a sweep with the same seed only computes the missing
+    realizations.  Realization `i` of every cell runs on the stream `realization_rng(seed, i)`.
+
+    With `checkpoint_every`, realizations still running also save their state next to their cache
+    entry every `checkpoint_every` steps (see `run_sim`), and rerunning an interrupted sweep with
+    the same `cache_dir` and seed carries them on from their last checkpoint.
+
+    Parameters
+    ----------
+    kwds : dict
+        kwargs for `run_sim` shared by every cell
+    grid : dict or List[dict]
+        kwargs that vary across cells, see `param_grid`
+    cache_dir : str
+        directory of the cached realizations
+    n_proc : int
+        num processes
+    n_iter : int
+        num realizations per cell
+    seed : int (optional)
+        seed of the ensemble.  Without one the cache can't be reused by later sweeps.
+    chunksize : int
+        number of realizations sent to a worker at a time
+    checkpoint_every : int (optional)
+        number of steps between checkpoints of each realization
+    resume : bool
+        whether to resume realizations from the checkpoints found in `cache_dir` rather than
+        starting them over
+
+    Returns
+    -------
+    List[tuple(dict, pd.DataFrame)]
+        the params of each cell and its realizations aggregated as in `run_all`
+    """
+    os.makedirs(cache_dir, exist_ok=True)
+    entropy = np.random.SeedSequence(seed).entropy
+    cells = param_grid(grid)
+    results = [[None] * n_iter for _ in cells]
+    jobs = []
+    for c, cell in enumerate(cells):
+        cell_kwds = dict(kwds, **cell)
+        for i in range(n_iter):
+            path = os.path.join(cache_dir, cache_key(cell_kwds, entropy, i) + ".npy")
+            if os.path.exists(path):
+                results[c][i] = pd.DataFrame(np.load(path))
+            else:
+                seed_seq = np.random.SeedSequence(entropy, spawn_key=(i,))
+                jobs.append((c, i, cell_kwds, seed_seq, path, checkpoint_every, resume))
+
+    if jobs:
+        with mp.Pool(processes=min(mp.cpu_count(), n_proc)) as pool:
+            for c, i, df in pool.imap_unordered(_run_cached, jobs, chunksize):
+                results[c][i] = df
+            pool.close()
+            pool.join()
+    return [(cell, aggregate_realizations(results[c], n_iter)) for c, cell in enumerate(cells)]
+
+
 def get_points(lst):
     """
     get list of people in each category
 
     Parameters
     ----------
-    lst : List[Patient]
+    lst : List[Patient] or Population
 
     Returns
     -------
     dict
     """
+    if isinstance(lst, Population):
+        return lst.get_points()
     dct = {
         "dead": [(x.x, x.y) for x in lst if x._is_dead],
         "infected": [(x.x, x.y) for x in lst if x.infection.active],
@@ -128,21 +599,50 @@ def get_points(lst):
     return {k: np.array(v).T for k, v in dct.items()}
 
 
-def run_sim_for_animation(**kwargs):
-    """Run sims and generate animation of people."""
-    partial_isolate_frac = kwargs.get("frac", 0.1)
-    patients = new_patients(**kwargs)
-    ret_lst = [get_points(patients)]
+def run_sim_for_animation(rng=None, frames_file=None, **kwargs):
+    """
+    Run sims and generate animation of people.
 
-    randomly_infect(patients, kwargs.get("initially_infected", 1))
+    Parameters
+    ----------
+    rng : np.random.Generator or int (optional)
+        random number generator or seed
+    frames_file : str (optional)
+        `.npy` file to record the frames to.  If not given they are kept in memory.
+
+    Returns
+    -------
+    np.ndarray
+        frames of `(x, y, state)` for everyone, see `FrameRecorder`
+    """
+    rng = np.random.default_rng(rng)
+    partial_isolate_frac = kwargs.get("frac", 0.1)
     steps = kwargs.get("steps", 100)
+    patients = new_population(rng=rng, **kwargs)
+    patients.backend = kwargs.get("backend", "numpy")
+    recorder = FrameRecorder(steps, len(patients), path=frames_file)
+    recorder.record(patients)
+
+    patients.infect(np.arange(kwargs.get("initially_infected", 1)))
     for _ in range(steps):
-        Patient.find_interactions(patients, partial_isolate=True, frac=partial_isolate_frac)
-        for patient in patients:
-            patient.step()
-        ret_lst.append(get_points(patients))
-    create_animation(ret_lst, total_frames=steps, fps=kwargs.get("fps", 15))
-    return ret_lst
+        patients.find_interactions(
+            partial_isolate=True,
+            frac=partial_isolate_frac,
+            rng=rng,
+            mode=kwargs.get("interaction_mode", "infectious"),
+        )
+        patients.step()
+        recorder.record(patients)
+    recorder.close()
+    frames = load_frames(frames_file) if frames_file else recorder.frames
+    create_animation(
+        frames,
+        total_frames=steps,
+        fps=kwargs.get("fps", 15),
+        substeps=kwargs.get("substeps", 1),
+        n_proc=kwargs.get("n_proc", 1),
+    )
+    return frames
 
 
 def generate_plot_and_animation():
@@ -189,14 +689,20 @@ def iterate_through_proactive_isolate():
         partial_isolate_frac=0.4,
     )
 
-    for proactive_isolate_frac in [0.3, 0.4, 0.6, 0.7, 0.8]:
-        params["proactive_isolate_frac"] = proactive_isolate_frac
-        pct = 100 * proactive_isolate_frac
-        run_all(
-            params,
-            n_proc=8,
-            n_iter=32,
-            output_file=os.path.join(DATA_PATH, "results_{}_pct.csv".format(pct)),
+    sweep = run_sweep(
+        params,
+        grid={"proactive_isolate_frac": [0.3, 0.4, 0.6, 0.7, 0.8]},
+        cache_dir=os.path.join(DATA_PATH, "cache"),
+        n_proc=8,
+        n_iter=32,
+        seed=0,
+        checkpoint_every=100,
+    )
+    for cell, df in sweep:
+        pct = 100 * cell["proactive_isolate_frac"]
+        df.to_csv(os.path.join(DATA_PATH, "results_{}_pct.csv".format(pct)), header=True)
+        plot_curve(
+            df,
             title="{}% social distancing".format(int(pct)),
             output_plot="assets/{}_pct.png".format(int(pct)),
         )
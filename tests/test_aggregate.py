@@ -0,0 +1,56 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from covid.aggregate import StreamingAggregator
+
+COLS = ["infected", "dead", "immune", "total", "susceptible"]
+
+
+def realizations(n_iter, high, seed=0):
+    rng = np.random.default_rng(seed)
+    for _ in range(n_iter):
+        df = pd.DataFrame(rng.integers(0, high, size=(8, len(COLS))), columns=COLS)
+        df["step"] = np.arange(8)
+        yield df
+
+
+def exact(results):
+    df = pd.concat(results)
+    agg = df.groupby("step").agg(["mean", "median", "std", "count"])
+    agg.columns = [f"{col} {stat}" for col, stat in agg.columns]
+    return agg
+
+
+def test_matches_exact():
+    aggregator = StreamingAggregator()
+    for df in realizations(25, 300):
+        aggregator.update(df)
+    expected = exact(realizations(25, 300))
+    pd.testing.assert_frame_equal(
+        aggregator.result(), expected[aggregator.result().columns], check_dtype=False
+    )
+
+    values = np.stack([df[COLS].to_numpy() for df in realizations(25, 300)])
+    np.testing.assert_allclose(aggregator.quantile(0.9), np.quantile(values, 0.9, axis=0))
+    assert "infected p90" in aggregator.result(percentiles=[10, 90]).columns
+
+
+def test_bins_widen():
+    aggregator = StreamingAggregator(n_bins=16)
+    for df in realizations(41, 1000, seed=1):
+        aggregator.update(df)
+    assert aggregator.bin_width == 64
+    assert aggregator.hist.shape == (8, len(COLS), 16)
+    values = np.stack([df[COLS].to_numpy() for df in realizations(41, 1000, seed=1)])
+    np.testing.assert_allclose(aggregator.mean, values.mean(axis=0))
+    np.testing.assert_allclose(aggregator.std, values.std(axis=0, ddof=1))
+    assert np.abs(aggregator.quantile(0.5) - np.median(values, axis=0)).max() <= 32
+
+
+def test_single_realization():
+    aggregator = StreamingAggregator()
+    with pytest.raises(ValueError):
+        aggregator.result()
+    aggregator.update(next(realizations(1, 10)))
+    assert aggregator.result()["infected std"].isna().all()
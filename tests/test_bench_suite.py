@@ -0,0 +1,35 @@
+from benchmarks.bench_suite import NOISE_FLOOR, compare, format_row
+
+
+def row(case, n, time_per_step):
+    return {
+        "case": case,
+        "n": n,
+        "steps": 1,
+        "time per step": time_per_step,
+        "agent-steps/s": n / time_per_step,
+        "peak MB": 1.0,
+    }
+
+
+def test_format_row():
+    result = row("count_cases", 500, 0.01)
+    assert format_row(result).split() == ["count_cases", "500", "1", "0.010000", "5e+04", "1.0"]
+    assert format_row(result, row("count_cases", 500, 0.005)).endswith(" 2.00x")
+
+
+def test_compare(capsys):
+    baseline = [row("slower", 1000, 0.01), row("same", 1000, 0.01), row("noise", 1000, 1e-6)]
+    results = [
+        row("slower", 1000, 0.02),
+        row("same", 1000, 0.012),
+        row("noise", 1000, 1e-6 + NOISE_FLOOR / 2),
+        # not in the baseline, as with the sizes of --quick
+        row("slower", 500, 0.02),
+        row("new", 1000, 0.02),
+    ]
+    regressions = compare(results, baseline, tolerance=0.3)
+    assert regressions == [results[0]]
+    out = capsys.readouterr().out.splitlines()
+    assert out[-5].endswith("2.00x  REGRESSION")
+    assert out[-2].endswith("1.0") and out[-1].endswith("1.0")
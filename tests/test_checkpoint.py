@@ -0,0 +1,73 @@
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from covid.checkpoint import load_checkpoint, save_checkpoint
+from covid.population import CaseHistory
+from covid.simulate import new_population
+from run_sim import cache_key, realization_rng, run_sim, run_sweep
+from tests.test_run_sim import PARAMS
+
+LONG = dict(PARAMS, n=80, steps=20, stop_when_extinct=False)
+
+
+def test_round_trip(tmp_path):
+    rng = np.random.default_rng(0)
+    pop = new_population(50, rng=rng)
+    pop.infect(np.arange(5))
+    pop.step()
+    pop.remove(np.array([1, 7, 30]))
+    history = CaseHistory(4)
+    history.append(pop, step=0)
+    path = str(tmp_path / "c.npz")
+    save_checkpoint(path, pop, history, rng, 1, extra=np.arange(3))
+
+    state = load_checkpoint(path)
+    assert state["step"] == 1
+    np.testing.assert_array_equal(state["extra"], np.arange(3))
+    np.testing.assert_array_equal(state["history"].records, history.records)
+    assert state["rng"].random() == rng.random()
+    loaded = state["population"]
+    for k, v in pop.to_arrays().items():
+        np.testing.assert_array_equal(loaded.to_arrays()[k], v)
+
+    # both carry on the same way, scheduled events included
+    for p in [pop, loaded]:
+        for _ in range(10):
+            p.step()
+    np.testing.assert_array_equal(loaded.state, pop.state)
+    np.testing.assert_array_equal(loaded.counts, pop.counts)
+
+
+def test_resume_matches_uninterrupted(tmp_path):
+    path = str(tmp_path / "c.npz")
+    expected = run_sim(rng=3, **LONG)
+    df = run_sim(rng=3, checkpoint=path, checkpoint_every=7, **LONG)
+    pd.testing.assert_frame_equal(df, expected)
+    assert load_checkpoint(path)["step"] == 14
+
+    resumed = run_sim(resume_from=path, **LONG)
+    pd.testing.assert_frame_equal(resumed, expected)
+
+    with pytest.raises(ValueError):
+        run_sim(resume_from=path, **dict(LONG, steps=30))
+
+
+def test_sweep_resumes(tmp_path):
+    cache_dir = tmp_path / "cache"
+    os.makedirs(cache_dir)
+    kwds = dict(LONG, proactive_isolate_frac=0.5)
+    keys = [cache_key(kwds, np.random.SeedSequence(4).entropy, i) for i in range(2)]
+    # a checkpoint of a run on another stream, to tell it was picked up
+    run_sim(rng=99, checkpoint=str(cache_dir / (keys[0] + ".ckpt.npz")), checkpoint_every=5, **kwds)
+
+    grid = {"proactive_isolate_frac": [0.5]}
+    run_sweep(LONG, grid, str(cache_dir), n_proc=1, n_iter=2, seed=4, checkpoint_every=5)
+    assert sorted(os.listdir(cache_dir)) == sorted(key + ".npy" for key in keys)
+    resumed, fresh = [pd.DataFrame(np.load(cache_dir / (key + ".npy"))) for key in keys]
+    pd.testing.assert_frame_equal(resumed, run_sim(rng=99, **kwds), check_dtype=False)
+    pd.testing.assert_frame_equal(
+        fresh, run_sim(rng=realization_rng(4, 1), **kwds), check_dtype=False
+    )
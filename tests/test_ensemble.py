@@ -0,0 +1,109 @@
+import numpy as np
+import pandas as pd
+
+from covid.ensemble import Ensemble, EnsembleHistory, block_heads
+from covid.population import DEAD, INFECTED, SUSCEPTIBLE
+from covid.simulate import add_remove_ensemble, new_ensemble
+from run_sim import run_all, run_batch, run_sim
+from tests.test_run_sim import PARAMS
+
+
+def test_block_heads():
+    np.testing.assert_array_equal(block_heads([3, 0, 4], [2, 1, 5]), [0, 1, 3, 4, 5, 6])
+    np.testing.assert_array_equal(block_heads([3, 2], 1), [0, 3])
+
+
+def test_realizations_do_not_meet():
+    pos = np.random.default_rng(0).uniform(-50, 50, size=(200, 2))
+    ensemble = Ensemble(
+        realization=np.repeat([0, 1], 200),
+        n_real=2,
+        pos=np.concatenate([pos, pos]),
+        vel=np.zeros((400, 2)),
+        infection_severity=0.1,
+        infection_length=30,
+    )
+    ensemble.infect(np.arange(200, 400))
+    for step in range(5):
+        ensemble.find_interactions(partial_isolate=False, rng=step, mode="pairs")
+        ensemble.find_interactions(partial_isolate=False, rng=step, mode="infectious")
+    assert (ensemble.state[:200] == SUSCEPTIBLE).all()
+    np.testing.assert_array_equal(ensemble.realization_counts()[:, INFECTED], [0, 200])
+
+
+def test_hermits_drawn_in_each_realization():
+    # 4, 35 and 0 hermits: as in run_sim, 10% of each realization's hermits rounded down
+    behavior = np.zeros((3, 50), dtype=bool)
+    behavior[0, :4] = behavior[1, 10:45] = True
+    ensemble = Ensemble(
+        realization=np.repeat(np.arange(3), 50),
+        n_real=3,
+        pos=np.zeros((150, 2)),
+        vel=np.zeros((150, 2)),
+        infection_severity=0.1,
+        infection_length=30,
+        isolate_behavior=behavior.ravel(),
+    )
+    rng = np.random.default_rng(0)
+    drawn = np.concatenate([ensemble._hermits(ensemble.isolate, 0.1, rng) for _ in range(100)])
+    assert ensemble.isolate[drawn].all()
+    np.testing.assert_array_equal(
+        np.bincount(ensemble.realization[drawn], minlength=3), [0, 300, 0]
+    )
+    # with replacement, over every hermit of the realization
+    assert set(drawn) == set(50 + np.arange(10, 45))
+
+
+def test_add_remove_each():
+    ensemble = new_ensemble([50, 80, 20], rng=0)
+    ensemble.kill(np.arange(10))
+    add_remove_ensemble([5, 0, 3], [12, 30, 25], ensemble, rng=1, outside_infections=2)
+    counts = ensemble.realization_counts()
+    np.testing.assert_array_equal(counts.sum(axis=1), [50 - 12 + 5, 80 - 30, 0])
+    np.testing.assert_array_equal(counts[:, INFECTED], [2, 0, 0])
+    assert counts[0, DEAD] == 10
+    np.testing.assert_array_equal(
+        counts, np.bincount(ensemble.realization * 4 + ensemble.state, minlength=12).reshape(3, 4)
+    )
+
+
+def test_history():
+    ensemble = new_ensemble([5, 7], rng=0)
+    ensemble.infect([0, 5, 6])
+    history = EnsembleHistory(2, 3)
+    history.append(ensemble, step=0)
+    history.fill()
+    assert list(history.records(1)["infected"]) == [2] * 4
+    assert list(history.records(1)["total"]) == [7] * 4
+    assert list(history.records(0)["step"]) == [0, 1, 2, 3]
+
+
+def test_run_batch_matches_run_sim():
+    dfs = run_batch(n_real=60, rng=0, **PARAMS)
+    assert len(dfs) == 60
+    expected = run_sim(rng=0, **PARAMS)
+    assert all(list(df.columns) == list(expected.columns) for df in dfs)
+    assert all(len(df) == len(expected) for df in dfs)
+
+    def ever_infected(runs):
+        last = np.array([df[["infected", "immune", "dead"]].iloc[-1].sum() for df in runs])
+        return last.mean(), last.var(ddof=1) / last.size
+
+    a, var_a = ever_infected(dfs)
+    b, var_b = ever_infected([run_sim(rng=s, **PARAMS) for s in range(60)])
+    assert abs(a - b) < 4 * np.sqrt(var_a + var_b)
+
+
+def test_run_all_batches(tmp_path):
+    run_all(
+        PARAMS,
+        str(tmp_path / "results.csv"),
+        n_proc=2,
+        n_iter=7,
+        seed=0,
+        batch_size=3,
+        output_plot=tmp_path / "a.png",
+    )
+    df = pd.read_csv(tmp_path / "results.csv", index_col="step")
+    assert (df["total count"] == 7).all()
+    assert df["infected mean"].iloc[0] == PARAMS["initially_infected"]
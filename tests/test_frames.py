@@ -0,0 +1,43 @@
+import numpy as np
+
+from covid.frames import FrameRecorder, frame_points, load_frames
+from covid.population import Population
+from covid.simulate import new_patients
+
+
+def run(recorder, pop, steps):
+    recorder.record(pop)
+    points = [pop.get_points()]
+    for step in range(steps):
+        pop.find_interactions(rng=step)
+        pop.step()
+        recorder.record(pop)
+        points.append(pop.get_points())
+    recorder.close()
+    return points
+
+
+def test_frames_match_points():
+    pop = Population.from_patients(new_patients(100, vel_std=1.0, rng=0))
+    pop.infect(np.arange(10))
+    recorder = FrameRecorder(5, len(pop))
+    points = run(recorder, pop, 5)
+    assert recorder.frames.shape == (6, 100, 3)
+    for frame, expected in zip(recorder.frames, points):
+        actual = frame_points(frame)
+        for k, v in expected.items():
+            np.testing.assert_allclose(actual[k], v, rtol=1e-6)
+
+
+def test_frames_on_disk(tmp_path):
+    path = str(tmp_path / "frames.npy")
+    pop = Population.from_patients(new_patients(50, rng=1))
+    pop.infect([0])
+    pop.remove([3, 7])
+    run(FrameRecorder(4, 50, path=path), pop, 4)
+    frames = load_frames(path)
+    assert isinstance(frames, np.memmap)
+    assert frames.shape == (5, 50, 3)
+    assert np.isnan(frames[:, [3, 7]]).all()
+    assert not np.isnan(frames[:, pop.ids]).any()
+    np.testing.assert_allclose(frames[-1, pop.ids, :2], pop.pos, rtol=1e-6)
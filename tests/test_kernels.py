@@ -0,0 +1,69 @@
+from unittest import mock
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from covid import kernels, neighbors
+from covid.population import _LOWER, _UPPER
+from run_sim import run_sim
+from tests.test_run_sim import PARAMS
+
+
+@pytest.fixture
+def points():
+    rng = np.random.default_rng(3)
+    return rng.uniform(-50, 50, size=(2, 300)), rng.uniform(-55, 55, size=(2, 20))
+
+
+def test_loops_match_numpy(points):
+    (x, y), (qx, qy) = points
+    for a, b in zip(kernels.loop_find_pairs(x, y, 8), neighbors.find_pairs(x, y, 8)):
+        np.testing.assert_allclose(a, b)
+
+    q, j, dist = kernels.loop_find_neighbors(x, y, qx, qy, 8)
+    eq, ej, edist = neighbors.find_neighbors(x, y, qx, qy, 8)
+    expected = sorted(zip(eq, ej, edist))
+    assert sorted(zip(q, j, dist)) == pytest.approx(expected)
+
+
+def test_loops_grow_outputs():
+    # far more pairs than the room the loops start with
+    x, y = np.random.default_rng(1).uniform(0, 1, size=(2, 50))
+    for a, b in zip(kernels.loop_find_pairs(x, y, 8), neighbors.find_pairs(x, y, 8)):
+        np.testing.assert_allclose(a, b)
+    assert kernels.loop_find_neighbors(x, y, x[:2], y[:2], 8)[0].size == 100
+
+
+def test_move_loop_matches_numpy():
+    rng = np.random.default_rng(0)
+    pos = rng.uniform(-52, 52, size=(100, 2))
+    vel = rng.normal(size=(100, 2))
+    moving = rng.random(100) < 0.7
+    p1, v1, p2, v2 = pos.copy(), vel.copy(), pos.copy(), vel.copy()
+    kernels.move(p1, v1, moving, _LOWER, _UPPER, 1.0)
+    kernels._move_loop(p2, v2, moving, _LOWER, _UPPER, 1.0)
+    np.testing.assert_allclose(p1, p2)
+    np.testing.assert_allclose(v1, v2)
+
+
+def test_backend_fallback():
+    assert kernels.get_backend("numpy") is kernels.NUMPY
+    with pytest.raises(ValueError):
+        kernels.get_backend("cuda")
+    if kernels.HAVE_NUMBA:
+        pytest.skip("numba is installed")
+    with pytest.warns(RuntimeWarning):
+        assert kernels.get_backend("numba") is kernels.NUMPY
+
+
+@pytest.mark.parametrize("interaction_mode", ["pairs", "infectious"])
+def test_loops_run_sim_matches_numpy(interaction_mode):
+    # the loops run as plain Python without numba, and give exactly the same trajectories
+    kwds = dict(PARAMS, n=150, steps=15, interaction_mode=interaction_mode)
+    expected = run_sim(rng=2, backend="numpy", **kwds)
+    with mock.patch("covid.population.get_backend", return_value=kernels.LOOPS) as get_backend:
+        df = run_sim(rng=2, backend="numba", **kwds)
+    get_backend.assert_called_with("numba")
+    assert df["immune"].iloc[-1] + df["dead"].iloc[-1] > PARAMS["initially_infected"]
+    pd.testing.assert_frame_equal(df, expected)
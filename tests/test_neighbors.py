@@ -0,0 +1,72 @@
+from unittest import mock
+
+import numpy as np
+import pytest
+
+from covid.model import Patient, Virus
+from covid.neighbors import (
+    brute_force_pairs,
+    find_neighbors,
+    find_pairs,
+    has_neighbor,
+    morton_codes,
+    morton_order,
+)
+
+
+@pytest.mark.parametrize("n,max_dist", [(0, 10), (1, 10), (2, 10), (50, 10), (500, 10), (500, 3.5)])
+def test_find_pairs_matches_brute_force(n, max_dist):
+    np.random.seed(0)
+    x, y = 100 * np.random.random_sample(size=(2, n)) - 50
+    i, j, dist = find_pairs(x, y, max_dist=max_dist)
+    bi, bj, bdist = brute_force_pairs(x, y, max_dist=max_dist)
+    np.testing.assert_array_equal(i, bi)
+    np.testing.assert_array_equal(j, bj)
+    np.testing.assert_allclose(dist, bdist)
+
+
+def test_find_pairs_outside_box():
+    x = np.array([-60.0, -55.0, 70.0, 71.0, 0.0])
+    y = np.array([0.0, 0.0, 70.0, 60.5, 0.0])
+    i, j, _ = find_pairs(x, y, max_dist=10)
+    assert list(zip(i, j)) == [(0, 1), (2, 3)]
+
+
+def test_find_neighbors_matches_brute_force():
+    rng = np.random.default_rng(2)
+    x, y = rng.uniform(-50, 50, size=(2, 400))
+    qx, qy = rng.uniform(-60, 60, size=(2, 30))
+    q, j, dist = find_neighbors(x, y, qx, qy, max_dist=7)
+    full = np.hypot(qx[:, None] - x, qy[:, None] - y)
+    assert set(zip(q, j)) == set(zip(*np.nonzero(full < 7)))
+    np.testing.assert_allclose(dist, full[q, j])
+
+    i, j, _ = brute_force_pairs(x, y, max_dist=7)
+    expected = np.zeros(x.size, dtype=bool)
+    expected[i] = expected[j] = True
+    np.testing.assert_array_equal(has_neighbor(x, y, max_dist=7), expected)
+
+
+def test_morton_order():
+    # a 4x4 grid is traversed as four Zs, one per quadrant
+    x, y = np.meshgrid(np.arange(4.0), np.arange(4.0), indexing="ij")
+    x, y = x.ravel(), y.ravel()
+    codes = morton_codes(x, y, bits=2)
+    np.testing.assert_array_equal(codes[[0, 4, 1, 5, 8, 12, 9, 13]], np.arange(8))
+    np.testing.assert_array_equal(np.sort(codes), np.arange(16))
+    np.testing.assert_array_equal(morton_order(x[::-1], y[::-1], bits=2), 15 - np.argsort(codes))
+    assert morton_codes([1.0, 1.0], [2.0, 2.0]).tolist() == [0, 0]
+
+
+def test_find_interactions_pairs():
+    np.random.seed(1)
+    pos = 100 * np.random.random_sample(size=(200, 2)) - 50
+    patients = [Patient(x, y, 0, 0, infection=Virus(0.1)) for x, y in pos]
+    with mock.patch.object(Patient, "interact", autospec=True) as interact:
+        Patient.find_interactions(patients, partial_isolate=False)
+    index = {id(p): k for k, p in enumerate(patients)}
+    seen = [(index[id(c.args[0])], index[id(c.args[1])]) for c in interact.call_args_list]
+    i, j, _ = brute_force_pairs(pos[:, 0], pos[:, 1])
+    expected = set(zip(i, j)) | set(zip(j, i))
+    assert len(seen) == len(expected)
+    assert set(seen) == expected
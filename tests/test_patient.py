@@ -112,7 +112,10 @@ def fake_fn(x, p=None):
     return bool(x)
 
 
-@mock.patch("covid.model.np.random.choice", fake_fn)
+def fake_rng(seed=None):
+    return mock.Mock(choice=fake_fn, normal=lambda loc=0.0, scale=1.0: loc)
+
+
 def init_patient_pair():
     p1 = Patient(1, 1, 1, 1, infection=Virus(10, active=False, immune=False),)
 
@@ -120,7 +123,7 @@ def init_patient_pair():
     return p1, p2
 
 
-@mock.patch("covid.model.np.random.choice", fake_fn)
+@mock.patch("covid.model.np.random.default_rng", fake_rng)
 def test_interact():
     p1, p2 = init_patient_pair()
     # cant be infected
@@ -136,7 +139,7 @@ def test_interact():
     assert p1.infection.active
 
 
-@mock.patch("covid.model.np.random.choice", fake_fn)
+@mock.patch("covid.model.np.random.default_rng", fake_rng)
 def test_interact_dist():
     p1, p2 = init_patient_pair()
     # can be infected, but too far away
@@ -145,7 +148,7 @@ def test_interact_dist():
     assert not p2.infection.active
 
 
-@mock.patch("covid.model.np.random.choice", fake_fn)
+@mock.patch("covid.model.np.random.default_rng", fake_rng)
 def test_interact_thresh():
     p1, p2 = init_patient_pair()
     # can be infected, but thresh too high
@@ -0,0 +1,309 @@
+import numpy as np
+import pytest
+
+from covid.model import Patient, Virus
+from covid.population import (
+    DEAD,
+    IMMUNE,
+    INFECTED,
+    SUSCEPTIBLE,
+    CaseHistory,
+    EventQueue,
+    Population,
+    transmit,
+)
+from covid.simulate import add_remove_patients, new_patients, new_population, randomly_infect
+
+
+def test_severity_matches_virus():
+    lengths = [10, 10.5, 19.0, 23.7]
+    pop = Population(
+        pos=np.zeros((4, 2)),
+        vel=np.zeros((4, 2)),
+        infection_severity=0.7,
+        infection_length=lengths,
+    )
+    viruses = [Virus(0.7, infection_length=length) for length in lengths]
+    for _ in range(8):
+        np.testing.assert_allclose(pop.severity, [v.severity for v in viruses])
+        pop.t -= 1
+        for v in viruses:
+            v.t -= 1
+
+
+def test_from_patients_state():
+    patients = [Patient(i, i, 0, 0, infection=Virus(0.1)) for i in range(4)]
+    patients[1].infection.infect()
+    patients[2].infection.recover()
+    patients[3]._is_dead = True
+    pop = Population.from_patients(patients)
+    assert list(pop.state) == [SUSCEPTIBLE, INFECTED, IMMUNE, DEAD]
+    assert list(pop.susceptible) == [p.susceptible for p in patients]
+
+
+def test_step_matches_patients():
+    patients = new_patients(
+        200, vel_std=2.0, mortality_thresh=0.3, proactive_isolate_frac=0.2, rng=3
+    )
+    for p in patients[::3]:
+        p.infection.infect()
+    pop = Population.from_patients(patients)
+    for _ in range(40):
+        for p in patients:
+            p.step()
+        pop.step()
+        np.testing.assert_allclose(pop.pos, [(p.x, p.y) for p in patients])
+        assert list(pop.is_dead) == [p.is_dead for p in patients]
+        assert list(pop.isolate) == [p.isolate for p in patients]
+        assert list(pop.state == INFECTED) == [p.infection.active for p in patients]
+
+
+def test_isolates_on_the_step_of_death():
+    # mortality just below the isolation threshold: people isolate on the step they die
+    patients = new_patients(
+        2000, infection_length_mean=8, infection_length_std=1.0, mortality_thresh=0.38, rng=0
+    )
+    for p in patients[::4]:
+        p.infection.infect()
+    pop = Population.from_patients(patients)
+    for _ in range(20):
+        for p in patients:
+            p.step()
+        pop.step()
+        np.testing.assert_allclose(pop.pos, [(p.x, p.y) for p in patients])
+        assert list(pop.is_dead) == [p.is_dead for p in patients]
+        assert list(pop.isolate) == [p.isolate for p in patients]
+
+
+def test_isolated_do_not_move():
+    pop = Population(
+        pos=[(1, 1), (2, 2)],
+        vel=[(1, 1), (1, 1)],
+        infection_severity=1.0,
+        infection_length=10,
+        mortality_thresh=1.1,
+        isolate_thresh=0.0,
+    )
+    pop.infect([0])
+    for _ in range(3):
+        pop.step()
+    assert pop.isolate[0] and not pop.isolate[1]
+    np.testing.assert_allclose(pop.pos, [(1, 1), (5, 5)])
+
+
+def test_dies():
+    pop = Population(
+        pos=[(1, 1)],
+        vel=[(1, 1)],
+        infection_severity=1.0,
+        infection_length=10,
+        mortality_thresh=0.5,
+    )
+    pop.infect([0])
+    for _ in range(10):
+        pop.step()
+    assert pop.is_dead[0]
+    assert pop.count_cases() == {
+        "infected": 0,
+        "dead": 1,
+        "immune": 0,
+        "total": 0,
+        "susceptible": 0,
+    }
+
+
+@pytest.mark.parametrize("remove", [[False, True, False], [0, 2]])
+def test_remove_and_extend(remove):
+    pop = Population(
+        pos=np.arange(6).reshape(3, 2),
+        vel=np.zeros((3, 2)),
+        infection_severity=[0.1, 0.2, 0.3],
+        infection_length=10,
+    )
+    pop.remove(np.array(remove))
+    pop.extend([Patient(9, 9, 0, 0, infection=Virus(0.9, active=True))])
+    assert len(pop) == len(pop.t) == pop.pos.shape[0]
+    assert pop.state[-1] == INFECTED
+    assert pop.infection_severity[-1] == 0.9
+
+
+def test_sort_spatially():
+    pop = new_population(300, rng=0)
+    pop.infect(np.arange(0, 300, 7))
+    pop.remove(np.arange(0, 300, 11))
+    pop.extend(new_population(20, rng=1))
+    unsorted = Population.from_arrays(pop.to_arrays())
+    pop.sort_spatially()
+    assert not np.array_equal(pop.ids, unsorted.ids)
+    np.testing.assert_array_equal(pop._slot[pop.ids], np.arange(len(pop)))
+    np.testing.assert_array_equal(pop.counts, unsorted.counts)
+
+    # everyone is the same person in a different slot, and their events follow them
+    for _ in range(30):
+        pop.step()
+        unsorted.step()
+    by_id = np.argsort(pop.ids)
+    expected = np.argsort(unsorted.ids)
+    np.testing.assert_array_equal(pop.state[by_id], unsorted.state[expected])
+    np.testing.assert_array_equal(pop.pos[by_id], unsorted.pos[expected])
+    np.testing.assert_array_equal(pop.isolated[by_id], unsorted.isolated[expected])
+
+
+def test_transmit():
+    state = np.array([INFECTED, SUSCEPTIBLE, IMMUNE, SUSCEPTIBLE, INFECTED])
+    prob = np.array([1.0, 1.0, 1.0, 1.0, 0.0])
+    src = np.array([0, 0, 4, 1, 0])
+    dst = np.array([1, 2, 3, 0, 3])
+    dist = np.array([1.0, 1.0, 1.0, 1.0, 5.0])
+    infected = transmit(src, dst, dist, state, prob, rng=0)
+    assert list(infected) in ([1], [1, 3])
+    assert 1 in infected
+
+
+def test_transmit_rate():
+    n = 20000
+    state = np.array([INFECTED] + [SUSCEPTIBLE] * n)
+    prob = np.ones(n + 1)
+    src, dst = np.zeros(n, dtype=int), np.arange(1, n + 1)
+    infected = transmit(src, dst, np.full(n, 2.0), state, prob, rng=0)
+    assert abs(infected.size / n - 0.25) < 0.02
+
+
+def test_find_interactions_reproducible():
+    def run(seed):
+        pop = Population.from_patients(new_patients(300, proactive_isolate_frac=0.3, rng=seed))
+        pop.infect(np.arange(30))
+        for _ in range(5):
+            pop.find_interactions(rng=seed)
+            pop.step()
+        return pop
+
+    a, b, c = run(7), run(7), run(8)
+    np.testing.assert_array_equal(a.pos, b.pos)
+    np.testing.assert_array_equal(a.state, b.state)
+    assert not np.array_equal(a.pos, c.pos)
+
+
+@pytest.mark.parametrize("infected", [3, 150])
+def test_infectious_mode_matches_pairs(infected):
+    def run(mode):
+        pop = Population.from_patients(new_patients(300, proactive_isolate_frac=0.3, rng=2))
+        pop.infect(np.arange(infected))
+        for step in range(10):
+            pop.find_interactions(rng=step, mode=mode)
+            pop.step()
+        return pop
+
+    a, b = run("pairs"), run("infectious")
+    np.testing.assert_array_equal(a.state, b.state)
+    np.testing.assert_array_equal(a.vel, b.vel)
+    with pytest.raises(ValueError):
+        a.find_interactions(mode="nearest")
+
+
+def test_counters_track_transitions():
+    pop = Population.from_patients(new_patients(500, rng=0))
+    pop.infect(np.arange(0, 500, 7))
+    history = CaseHistory(20)
+    history.append(pop, step=0)
+    for step in range(20):
+        pop.find_interactions(rng=step)
+        pop.step()
+        pop.remove(np.arange(step % 5, len(pop), 37))
+        pop.extend(new_patients(3, rng=step))
+        np.testing.assert_array_equal(pop.counts, np.bincount(pop.state, minlength=4))
+        history.append(pop, step=step + 1)
+    assert history.size == 21
+    assert list(history.records["step"]) == list(range(21))
+    assert history.records[-1]["total"] == len(pop) - pop.is_dead.sum()
+
+
+def test_event_queue():
+    queue = EventQueue()
+    queue.push(np.array([3, 1, 3, 2]), 0, np.array([10, 11, 12, 13]))
+    queue.push(np.array([1]), 1, np.array([14]))
+    assert queue.pop_due(0) == {}
+    due = queue.pop_due(2)
+    assert sorted(due) == [0, 1]
+    assert sorted(due[0]) == [11, 13] and list(due[1]) == [14]
+    assert list(queue.pop_due(10)[0]) == [10, 12]
+    assert len(queue) == 0
+
+
+def test_events_match_patients():
+    patients = new_patients(50, mortality_thresh=0.3, rng=5)
+    for p in patients[:10]:
+        p.infection.infect()
+    pop = Population.from_patients(patients)
+    for step in range(30):
+        if step == 3:
+            for p in patients[20:25]:
+                p.infection.infect()
+            pop.infect(np.arange(20, 25))
+        if step == 7:
+            newcomers = new_patients(20, mortality_thresh=0.3, rng=6)
+            for p in newcomers[:12]:
+                p.infection.infect()
+            pop.remove(np.arange(0, 50, 9))
+            patients = patients + newcomers
+            pop.extend(newcomers)
+        for p in patients:
+            p.step()
+        pop.step()
+        # removal reorders the population, so line the patients up by id
+        lst = [patients[i] for i in pop.ids]
+        np.testing.assert_allclose(pop.pos, [(p.x, p.y) for p in lst])
+        assert list(pop.is_dead) == [p.is_dead for p in lst]
+        assert list(pop.isolate) == [p.isolate for p in lst]
+        assert list(pop.state == IMMUNE) == [p.infection.immune and not p.is_dead for p in lst]
+
+
+def test_remove_keeps_ids():
+    pop = Population(
+        pos=np.arange(20).reshape(10, 2),
+        vel=np.zeros((10, 2)),
+        infection_severity=0.1,
+        infection_length=10,
+    )
+    pop.remove([1, 8, 9, 4])
+    assert len(pop) == 6
+    assert sorted(pop.ids) == [0, 2, 3, 5, 6, 7]
+    np.testing.assert_array_equal(pop.pos[:, 0], 2 * pop.ids)
+    pop.extend(
+        Population(pos=[(99, 99)], vel=[(0, 0)], infection_severity=0.1, infection_length=10)
+    )
+    assert pop.ids[-1] == 10
+    pop.remove(np.arange(len(pop)))
+    assert len(pop) == 0 and pop.counts.sum() == 0
+
+
+@pytest.mark.parametrize("n_dead,k", [(0, 5), (10, 5), (10, 85), (60, 5), (10, 200)])
+def test_sample_alive(n_dead, k):
+    pop = Population(
+        pos=np.zeros((100, 2)), vel=np.zeros((100, 2)), infection_severity=0.1, infection_length=10
+    )
+    pop.kill(np.arange(n_dead))
+    chosen = pop.sample_alive(k, rng=0)
+    assert chosen.size == min(k, 100 - n_dead) == np.unique(chosen).size
+    assert not pop.is_dead[chosen].any()
+
+
+def test_add_remove_patients_removes_exactly():
+    pop = Population.from_patients(new_patients(100, rng=0))
+    pop.kill(np.arange(10))
+    pop = add_remove_patients(num_new=0, num_remove=7, patients=pop, rng=1)
+    assert len(pop) == 93 and pop.counts[DEAD] == 10
+    patients = new_patients(100, rng=0)
+    patients = add_remove_patients(num_new=0, num_remove=7, patients=patients, rng=1)
+    assert len(patients) == 93
+
+
+def test_new_population_matches_patients():
+    kwargs = dict(proactive_isolate_frac=0.3, infection_length_mean=7, mortality_thresh=0.8)
+    a = new_population(200, rng=4, **kwargs)
+    b = Population.from_patients(new_patients(200, rng=4, **kwargs))
+    randomly_infect(a, 5)
+    b.infect(np.arange(5))
+    for field in Population._FIELDS:
+        np.testing.assert_array_equal(getattr(a, field), getattr(b, field))
+    np.testing.assert_array_equal(a.counts, b.counts)
@@ -0,0 +1,38 @@
+import pandas as pd
+
+from covid.profiling import Profiler
+from run_sim import run_all, run_sim
+from tests.test_run_sim import PARAMS
+
+
+def test_run_sim_profile():
+    kwds = dict(PARAMS, mu_add_at_step=0.0, mu_remove_at_step=0.0, stop_when_extinct=False)
+    profiler = Profiler()
+    df = run_sim(rng=1, profiler=profiler, **kwds)
+    pd.testing.assert_frame_equal(df, run_sim(rng=1, **kwds))
+
+    prof = profiler.to_frame()
+    assert list(prof["step"]) == list(range(1, PARAMS["steps"] + 1))
+    for phase in ["interactions", "add_remove", "step", "count_cases"]:
+        assert (prof[f"{phase} time"] >= 0).all()
+    last = df.iloc[-1]
+    ever_infected = last["infected"] + last["immune"] + last["dead"]
+    assert prof["transmissions"].sum() == ever_infected - PARAMS["initially_infected"]
+    assert (prof["rng draws"] >= prof["transmissions"]).all()
+    assert (prof["people"] == PARAMS["n"]).all()
+
+
+def test_run_all_profile(tmp_path):
+    profile_file = tmp_path / "profile.json"
+    run_all(
+        PARAMS,
+        str(tmp_path / "results.csv"),
+        n_proc=2,
+        n_iter=3,
+        seed=0,
+        profile_file=str(profile_file),
+        output_plot=tmp_path / "a.png",
+    )
+    prof = pd.read_json(profile_file, orient="records")
+    assert sorted(prof["realization"].unique()) == [0, 1, 2]
+    assert "interactions time" in prof.columns
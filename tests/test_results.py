@@ -0,0 +1,47 @@
+import numpy as np
+import pandas as pd
+
+from covid.results import RealizationWriter, iter_realizations, load_realizations
+from run_sim import aggregate_realizations, realization_rng, run_all, run_sim
+from tests.test_run_sim import PARAMS
+
+
+def test_write_and_load(tmp_path):
+    path = str(tmp_path / "r.npz")
+    results = {i: run_sim(rng=realization_rng(0, i), **PARAMS) for i in range(5)}
+    with RealizationWriter(path, params=PARAMS, seed=0, chunk_size=2) as writer:
+        for i in [3, 0, 4, 1, 2]:
+            writer.append(i, results[i])
+
+    values, steps, meta = load_realizations(path, cols=["infected"])
+    assert list(values) == ["infected"]
+    assert values["infected"].shape == (5, PARAMS["steps"] + 1)
+    np.testing.assert_array_equal(values["infected"][3], results[3]["infected"])
+    np.testing.assert_array_equal(steps, results[0]["step"])
+    assert meta["params"] == PARAMS and meta["seed"] == "0"
+
+    for i, df in enumerate(iter_realizations(path)):
+        pd.testing.assert_frame_equal(df, results[i], check_dtype=False)
+
+
+def test_run_all_writes_realizations(tmp_path):
+    path = str(tmp_path / "r.npz")
+    output_file = str(tmp_path / "results.csv")
+    run_all(
+        PARAMS,
+        output_file,
+        n_proc=2,
+        n_iter=3,
+        seed=2,
+        realizations_file=path,
+        output_plot=tmp_path / "a.png",
+    )
+    values, _, meta = load_realizations(path)
+    assert meta["seed"] == "2"
+    np.testing.assert_array_equal(
+        values["dead"][1], run_sim(rng=realization_rng(2, 1), **PARAMS)["dead"]
+    )
+    expected = pd.read_csv(output_file, index_col="step")
+    pd.testing.assert_frame_equal(
+        aggregate_realizations(iter_realizations(path)), expected, check_dtype=False
+    )
@@ -0,0 +1,113 @@
+from unittest import mock
+
+import matplotlib
+import numpy as np
+import pandas as pd
+
+from run_sim import param_grid, realization_rng, run_all, run_sim, run_sweep
+
+matplotlib.use("Agg")
+
+PARAMS = dict(
+    n=60,
+    steps=10,
+    initially_infected=3,
+    mu_add_at_step=1.0,
+    mu_remove_at_step=1.0,
+    infection_length_mean=5,
+    proactive_isolate_frac=0.2,
+)
+
+
+def test_run_all(tmp_path):
+    output_file = tmp_path / "results.csv"
+    run_all(PARAMS, str(output_file), n_proc=2, n_iter=4, seed=1, output_plot=tmp_path / "a.png")
+    df = pd.read_csv(output_file, index_col="step")
+    assert list(df.index) == list(range(11))
+    for col in ["infected", "dead", "immune", "total", "susceptible"]:
+        for agg in ["mean", "median", "std", "count"]:
+            assert f"{col} {agg}" in df.columns
+    assert (df["total count"] == 4).all()
+    assert df["infected mean"].iloc[0] == 3
+
+    run_all(
+        PARAMS,
+        str(tmp_path / "again.csv"),
+        n_proc=2,
+        n_iter=4,
+        seed=1,
+        output_plot=tmp_path / "b.png",
+    )
+    pd.testing.assert_frame_equal(df, pd.read_csv(tmp_path / "again.csv", index_col="step"))
+
+
+def test_run_sim_reproducible():
+    a = run_sim(rng=realization_rng(3, 1), **PARAMS)
+    b = run_sim(rng=realization_rng(3, 1), **PARAMS)
+    c = run_sim(rng=realization_rng(3, 2), **PARAMS)
+    pd.testing.assert_frame_equal(a, b)
+    assert not a.equals(c)
+
+
+def test_param_grid():
+    grid = param_grid({"a": [1, 2], "b": [3, 4, 5]})
+    assert len(grid) == 6
+    assert grid[0] == {"a": 1, "b": 3} and grid[-1] == {"a": 2, "b": 5}
+    assert param_grid([{"a": 1}, {"b": 2}]) == [{"a": 1}, {"b": 2}]
+
+
+def test_run_sweep_caches(tmp_path):
+    cache_dir = str(tmp_path / "cache")
+    grid = {"proactive_isolate_frac": [0.0, 0.5]}
+    sweep = run_sweep(PARAMS, grid, cache_dir, n_proc=2, n_iter=3, seed=4)
+    assert [cell for cell, _ in sweep] == param_grid(grid)
+    assert len(list((tmp_path / "cache").iterdir())) == 6
+
+    # same realizations as run_all with the same seed
+    kwds = dict(PARAMS, proactive_isolate_frac=0.5)
+    run_all(
+        kwds, str(tmp_path / "b.csv"), n_proc=2, n_iter=3, seed=4, output_plot=tmp_path / "b.png"
+    )
+    expected = pd.read_csv(tmp_path / "b.csv", index_col="step")
+    pd.testing.assert_frame_equal(sweep[1][1], expected, check_dtype=False)
+
+    # cached realizations are read back instead of being rerun
+    with mock.patch("run_sim.run_sim", side_effect=AssertionError):
+        cached = run_sweep(PARAMS, grid, cache_dir, n_proc=2, n_iter=3, seed=4)
+    pd.testing.assert_frame_equal(cached[0][1], sweep[0][1])
+
+    # extending the sweep only runs the new cell
+    grid["proactive_isolate_frac"].append(0.9)
+    run_sweep(PARAMS, grid, cache_dir, n_proc=2, n_iter=3, seed=4)
+    assert len(list((tmp_path / "cache").iterdir())) == 9
+
+
+def test_stop_when_extinct():
+    kwds = dict(PARAMS, steps=60, mu_add_at_step=0.0, mu_remove_at_step=0.0)
+    stopped = run_sim(rng=5, **kwds)
+    full = run_sim(rng=5, stop_when_extinct=False, **kwds)
+    assert stopped["infected"].iloc[-1] == 0
+    pd.testing.assert_frame_equal(stopped, full)
+
+    # people keep arriving and leaving after the epidemic ends, without bringing infections
+    kwds = dict(PARAMS, steps=60, outside_infections=0)
+    df = run_sim(rng=5, **kwds)
+    assert list(df["step"]) == list(range(61))
+    assert df["infected"].iloc[-1] == 0
+    assert df["total"].nunique() > 1
+
+
+def test_sort_every():
+    kwds = dict(PARAMS, n=200, steps=30, initially_infected=10)
+    df = run_sim(rng=5, sort_every=4, **dict(kwds, mu_add_at_step=0.0, mu_remove_at_step=0.0))
+    assert list(df["step"]) == list(range(31))
+    counts = df[["susceptible", "infected", "immune", "dead"]].sum(axis=1)
+    assert (counts == 200).all()
+
+    # sorting changes who draws which random number, not the statistics
+    ever_infected = {}
+    for sort_every in [None, 1]:
+        final = [run_sim(rng=s, sort_every=sort_every, **kwds).iloc[-1] for s in range(30)]
+        ever_infected[sort_every] = [r["infected"] + r["immune"] + r["dead"] for r in final]
+    err = np.hypot(*[np.std(v) / np.sqrt(30) for v in ever_infected.values()])
+    assert abs(np.mean(ever_infected[None]) - np.mean(ever_infected[1])) < 4 * err
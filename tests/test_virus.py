@@ -1,4 +1,6 @@
-from covid.model import Virus
+import numpy as np
+
+from covid.model import Virus, severity_curve, severity_table
 
 
 def test_step():
@@ -33,3 +35,12 @@ def test_step_inactive():
 
     assert virus.t == 100
     assert not virus.active
+
+
+def test_shared_curve():
+    for length in [10, 10.5, 19, 31.2, 200]:
+        virus = Virus(infection_severity=0.5, infection_length=length)
+        np.testing.assert_allclose(virus.curve, 0.5 * Virus.get_severity_curve(length))
+        assert virus.severity == virus.curve[virus.curve.size - virus.t - 1]
+    assert severity_curve(10.5).base is severity_curve(11).base
+    assert not severity_table(5).flags.writeable
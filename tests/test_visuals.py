@@ -0,0 +1,105 @@
+from unittest import mock
+
+import matplotlib
+import numpy as np
+
+from covid.frames import load_frames
+from covid.simulate import new_population
+from covid.visuals import (
+    FrameRenderer,
+    _render_segment,
+    _segment_jobs,
+    augment,
+    frame_chunks,
+    get_frame,
+    subframe,
+)
+from run_sim import get_points
+
+matplotlib.use("Agg")
+
+import matplotlib.pyplot as plt  # noqa: E402  pylint: disable=C0413
+
+
+def augment_loop(arr, numsteps):
+    xold, yold = arr[0], arr[1]
+    xnew, ynew = [], []
+    for i in range(len(xold) - 1):
+        for s in range(numsteps):
+            xnew.append(xold[i] + s * (xold[i + 1] - xold[i]) / numsteps)
+            ynew.append(yold[i] + s * (yold[i + 1] - yold[i]) / numsteps)
+    return np.array([xnew, ynew])
+
+
+def test_augment():
+    arr = np.random.default_rng(0).normal(size=(2, 7))
+    np.testing.assert_allclose(augment(arr, 4), augment_loop(arr, 4))
+    assert augment(arr[:, :1], 4).shape == (2, 0)
+    many = np.random.default_rng(1).normal(size=(5, 2, 7))
+    np.testing.assert_allclose(augment(many, 3)[2], augment_loop(many[2], 3))
+
+
+def test_subframe():
+    frames = np.zeros((3, 2, 3))
+    frames[1, :, :2] = [[4, 8], [np.nan, np.nan]]
+    frames[1, :, 2] = [1, np.nan]
+    np.testing.assert_allclose(subframe(frames, 1, 4), [[1, 2, 0], [np.nan, np.nan, 0]])
+    np.testing.assert_allclose(subframe(frames, 4, 4), frames[1])
+    np.testing.assert_allclose(subframe(frames, 6, 4)[0], [2, 4, 1])
+
+
+def test_frame_chunks():
+    assert frame_chunks(10, 3) == [(0, 3), (3, 7), (7, 10)]
+    assert frame_chunks(2, 4) == [(0, 1), (1, 2)]
+
+
+def test_segments_cover_frames(tmp_path):
+    rng = np.random.default_rng(0)
+    frames = rng.uniform(-50, 50, size=(6, 4, 3)).astype(np.float32)
+    frames[..., 2] = rng.integers(4, size=(6, 4))
+    np.save(tmp_path / "frames.npy", frames)
+    drawn = []
+
+    def fake_render(source, frame_nums, substeps, fps, output_file):
+        drawn.extend(get_frame(source, i, substeps) for i in frame_nums)
+
+    memmapped = load_frames(str(tmp_path / "frames.npy"))
+    for source, substeps in [(frames, 3), (memmapped, 3), (frames, 1)]:
+        drawn.clear()
+        n_frames = (len(frames) - 1) * substeps
+        with mock.patch("covid.visuals._render", fake_render):
+            for job in _segment_jobs(source, n_frames, substeps, 4, 20, str(tmp_path)):
+                _render_segment(job)
+        assert len(drawn) == n_frames
+        for i, dct in enumerate(drawn):
+            expected = get_frame(frames, i, substeps)
+            for k in expected:
+                np.testing.assert_allclose(dct[k], expected[k])
+
+
+def test_frame_renderer():
+    fig, ax = plt.subplots()
+    renderer = FrameRenderer(ax)
+    pop = new_population(30, rng=0)
+    pop.infect(np.arange(5))
+    pop.recover(np.arange(2))
+    dct = get_points(pop)
+    assert dct["dead"].size == 0
+
+    artists = renderer.draw(dct)
+    assert artists == list(renderer.artists.values())
+    for k, artist in renderer.artists.items():
+        np.testing.assert_allclose(artist.get_offsets(), dct[k].T.reshape(-1, 2))
+    assert renderer.artists["dead"].get_offsets().shape == (0, 2)
+    fig.canvas.draw()
+
+    # the next frame moves the same artists
+    pop.move_it(1)
+    pop.kill([0])
+    moved = get_points(pop)
+    assert renderer.draw(moved) == artists
+    for k, artist in renderer.artists.items():
+        np.testing.assert_allclose(artist.get_offsets(), moved[k].T.reshape(-1, 2))
+    assert len(renderer.artists["dead"].get_offsets()) == 1
+    assert all(a.get_offsets().shape == (0, 2) for a in renderer.init())
+    plt.close(fig)